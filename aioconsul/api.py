@@ -1,9 +1,17 @@
+import asyncio
 import logging
-from aioconsul.common import (RequestHandler, Response, drop_null,
-                              bool_to_int, timedelta_to_duration)
+import random
+import re
+import reprlib
+import time
+import weakref
+from aioconsul.common import (Governor, RequestHandler, Response,
+                              drop_null, bool_to_int, get_deadline,
+                              timedelta_to_duration)
 from aioconsul.encoders import json
 from aioconsul.exceptions import (ConflictError,
                                   ConsulError,
+                                  LimitExceeded,
                                   NotFound,
                                   UnauthorizedError)
 from aioconsul.util import extract_attr
@@ -24,19 +32,30 @@ class API:
         token (str): Token ID
         consistency (Consistency): One of the value as defined by
                                    :class:`~aioconsul.typing.Consistency`
+        log (ResponseLog): Logs responses at DEBUG level
+        limits (List[Limit]): Limits of requests, see :meth:`limit`
+        watchers (Set[Watcher]): Watchers running, stopped by :meth:`close`
     """
 
-    def __init__(self, address, *, token=None, consistency=None, loop=None):
+    def __init__(self, address, *, token=None, consistency=None, loop=None,
+                 hooks=None):
         self.token = token
         self.consistency = consistency
+        self.hooks = list(hooks or [])
+        self.limits = []
+        self.watchers = weakref.WeakSet()
+        self.log = ResponseLog()
         self.req_handler = RequestHandler(address, loop=loop)
         self.req_handler.json_loader = json.loads
         self._prepare_middlewares()
 
     def _prepare_middlewares(self):
         middlewares = [
+            limit_middleware,
+            hooks_middleware,
             token_middleware,
             watch_middleware,
+            deadline_middleware,
             consistency_middleware,
             body_middleware,
             parametrize_middleware,
@@ -45,11 +64,80 @@ class API:
         async def get_response(request):
             return await self.req_handler.request(**request)
 
+        if not self.hooks:
+            middlewares.remove(hooks_middleware)
+        if not self.limits:
+            middlewares.remove(limit_middleware)
+
         while middlewares:
             factory = middlewares.pop()
             get_response = factory(self, get_response)
         self.apply = get_response
 
+    def add_hook(self, hook):
+        """Adds an instrumentation hook
+
+        Parameters:
+            hook (Hooks): The hook
+        """
+        self.hooks.append(hook)
+        self._prepare_middlewares()
+
+    def remove_hook(self, hook):
+        """Removes an instrumentation hook
+
+        Parameters:
+            hook (Hooks): The hook
+        """
+        self.hooks.remove(hook)
+        self._prepare_middlewares()
+
+    def limit(self, prefix, *, methods=None, rate=None, burst=None,
+              concurrency=None, max_wait=None):
+        """Limits requests whose path starts with prefix
+
+        Parameters:
+            prefix (str): Path prefix, like ``/v1/kv/``
+            methods (Collection): Limited methods, all by default
+            rate (float): Requests per second, unlimited by default
+            burst (int): Requests allowed at once above rate
+            concurrency (int): Maximum number of requests in flight,
+                               unlimited by default
+            max_wait (float): Maximum seconds queued, forever by default,
+                              0 fails fast
+        Returns:
+            Governor: The governor of these requests
+
+        The longest matching prefix applies, so that ``/v1/catalog``
+        and ``/v1/catalog/register`` may have their own limits.
+        """
+        governor = Governor(rate=rate, burst=burst,
+                            concurrency=concurrency, max_wait=max_wait)
+        methods = {m.upper() for m in methods} if methods else None
+        self.limits.append(Limit(prefix, methods, governor))
+        self.limits.sort(key=lambda limit: len(limit.prefix), reverse=True)
+        self._prepare_middlewares()
+        return governor
+
+    def remove_limit(self, governor):
+        """Removes a limit
+
+        Parameters:
+            governor (Governor): The governor returned by :meth:`limit`
+        """
+        self.limits = [limit for limit in self.limits
+                       if limit.governor is not governor]
+        self._prepare_middlewares()
+
+    def emit(self, event, *args, **kwargs):
+        """Calls event on every hook
+
+        Parameters:
+            event (str): Name of the method of :class:`~aioconsul.hooks.Hooks`
+        """
+        for hook in self.hooks:
+            getattr(hook, event)(*args, **kwargs)
+
     @property
     def token(self):
         return self._token
@@ -88,13 +176,18 @@ class API:
             "params": deepcopy(request.get("params") or {}),
         })
         response = await self.apply(request)
+        self.log(response)
         return render(response)
 
-    def close(self):
-        if self.req_handler:
-            self.req_handler.close()
+    async def close(self, *, timeout=1.):
+        """Stops watchers, then closes connections
 
-    __del__ = close
+        Parameters:
+            timeout (float): Maximum seconds to wait for requests in flight
+        """
+        await asyncio.gather(*[watcher.stop()
+                               for watcher in list(self.watchers)])
+        await self.req_handler.close(timeout=timeout)
 
     def __repr__(self):
         return "<%s(%r)>" % (self.__class__.__name__, self.address)
@@ -127,6 +220,8 @@ def extract_blocking(obj):
 
 ConsulValue = namedtuple('ConsulValue', 'value meta')
 
+Limit = namedtuple('Limit', 'prefix methods governor')
+
 
 @singledispatch
 def consul(obj, meta=None):
@@ -209,6 +304,89 @@ def consistency_middleware(ctx, get_response):
     return middleware
 
 
+def match_limit(limits, method, path):
+    for limit in limits:
+        if path.startswith(limit.prefix) and \
+                (not limit.methods or method in limit.methods):
+            return limit
+
+
+def queue_timeout(request, governor):
+    """Returns how long request may be queued, and if its deadline or
+    its timeout is what bounds it
+    """
+    timeout, limit = governor.max_wait, get_deadline()
+    if request.get("timeout") is not None:
+        limit = min(limit or float("inf"),
+                    time.monotonic() + request["timeout"])
+    if limit is not None:
+        remaining = max(0, limit - time.monotonic())
+        if timeout is None or remaining < timeout:
+            return remaining, True
+    return timeout, False
+
+
+def limit_middleware(ctx, get_response):
+    """Queues requests above the limits of ctx
+
+    Only installed when limits are configured. Requests still queued at
+    their deadline raise :class:`asyncio.TimeoutError`, and the ones
+    queued longer than max_wait raise :class:`LimitExceeded`.
+    """
+    async def middleware(request):
+        limit = match_limit(ctx.limits, request["method"], request["path"])
+        if limit is None:
+            return await get_response(request)
+        governor = limit.governor
+        timeout, bounded = queue_timeout(request, governor)
+        queued, start = governor.waiting, time.monotonic()
+        try:
+            waited = await governor.acquire(timeout=timeout)
+        except LimitExceeded as error:
+            if ctx.hooks:
+                ctx.emit("on_throttle", request, prefix=limit.prefix,
+                         waited=time.monotonic() - start, queued=queued,
+                         error=error)
+            if bounded:
+                raise asyncio.TimeoutError() from None
+            raise
+        if ctx.hooks:
+            ctx.emit("on_throttle", request, prefix=limit.prefix,
+                     waited=waited, queued=queued)
+        if request.get("timeout") is not None:
+            request["timeout"] -= waited
+        try:
+            return await get_response(request)
+        finally:
+            governor.release()
+    return middleware
+
+
+def hooks_middleware(ctx, get_response):
+    """Calls hooks around requests
+
+    Only installed when hooks are registered.
+    """
+    async def middleware(request):
+        watch = request.get("watch")
+        ctx.emit("on_request_start", request)
+        start = time.perf_counter()
+        try:
+            response = await get_response(request)
+        except Exception as error:
+            ctx.emit("on_request_end", request, None,
+                     elapsed=time.perf_counter() - start, error=error)
+            raise
+        ctx.emit("on_request_end", request, response,
+                 elapsed=time.perf_counter() - start)
+        if watch and response.status < 400:
+            index, _ = extract_blocking(watch)
+            changed = extract_meta(response.headers).get("Index") != index
+            ctx.emit("on_watch_wakeup", request, response, changed=changed)
+        return response
+    return middleware
+
+
 def token_middleware(ctx, get_response):
     """Reinject token and consistency into requests.
     """
@@ -234,6 +412,53 @@ def watch_middleware(ctx, get_response):
     return middleware
 
 
+#: seconds kept between the end of a capped blocking query and the deadline
+DEADLINE_MARGIN = .1
+
+#: default wait of blocking queries, in seconds
+DEFAULT_WAIT = 300.
+
+
+def deadline_middleware(ctx, get_response):
+    """Bounds requests by their timeout and the deadline of the context
+
+    Blocking queries are capped to end before the deadline. Consul adds
+    up to wait / 16 of jitter to the wait, so it is capped to 16/17 of
+    the remaining time.
+    """
+    async def middleware(request):
+        timeout = request.pop("timeout", None)
+        limit = get_deadline()
+        if timeout is not None:
+            limit = min(limit or float("inf"), time.monotonic() + timeout)
+        if limit is None:
+            return await get_response(request)
+        remaining = limit - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        params = request.setdefault("params", {})
+        if params.get("index") is not None:
+            wait = parse_wait(params.get("wait")) or DEFAULT_WAIT
+            cap = (remaining - DEADLINE_MARGIN) * 16 / 17
+            if wait > cap:
+                params["wait"] = "%dms" % max(1, int(cap * 1000))
+        request["timeout"] = remaining
+        return await get_response(request)
+    return middleware
+
+
+WAIT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+WAIT_UNITS = {"ms": .001, "s": 1., "m": 60., "h": 3600.}
+
+
+def parse_wait(obj):
+    """Converts a wait parameter to seconds"""
+    if not obj:
+        return None
+    return sum(float(value) * WAIT_UNITS[unit]
+               for value, unit in WAIT_PATTERN.findall(obj))
+
+
 def body_middleware(ctx, get_response):
     async def middleware(request):
         data = request.get("data", None)
@@ -257,8 +482,58 @@ def parametrize_middleware(ctx, get_response):
     return middleware
 
 
+class ResponseLog:
+    """Logs responses at DEBUG level
+
+    Each record carries method, path, status, latency and body size,
+    also given as the ``consul`` extra attribute for structured handlers.
+    Nothing is formatted unless DEBUG is enabled for ``aioconsul.api``.
+
+    Parameters:
+        sample_rate (float): Fraction of responses logged
+        bodies (bool): Also log bodies, for troubleshooting
+        body_limit (int): Maximum length of logged bodies
+    """
+
+    def __init__(self, *, sample_rate=1., bodies=False, body_limit=1024):
+        self.sample_rate = sample_rate
+        self.bodies = bodies
+        self.body_limit = body_limit
+
+    def __call__(self, response):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.sample_rate < 1. and random.random() >= self.sample_rate:
+            return
+        record = {
+            "method": response.method,
+            "path": response.path,
+            "status": response.status,
+            "elapsed": response.elapsed,
+            "size": response.size
+        }
+        elapsed = (response.elapsed or 0.) * 1000
+        if self.bodies:
+            body = body_repr.repr(response.body)[:self.body_limit]
+            logger.debug("%s %s %s %.1fms %sB %s",
+                         response.method, response.path, response.status,
+                         elapsed, response.size, body,
+                         extra={"consul": record})
+        else:
+            logger.debug("%s %s %s %.1fms %sB",
+                         response.method, response.path, response.status,
+                         elapsed, response.size,
+                         extra={"consul": record})
+
+
+#: bounded repr, so that huge bodies are never fully formatted
+body_repr = reprlib.Repr()
+body_repr.maxlevel = 4
+body_repr.maxdict = body_repr.maxlist = 16
+body_repr.maxstring = body_repr.maxother = 256
+
+
 def render(response):
-    logger.info("%r", response)
     if response.status >= 400:
         data = consul(response)
         if response.status in (401, 403):
@@ -1,34 +1,54 @@
 from .client import Consul
-from .acl_endpoint import ACLEndpoint
+from .acl_endpoint import ACLEndpoint, ACLEvaluator, ACLPolicy
 from .agent_endpoint import AgentEndpoint
-from .catalog_endpoint import CatalogEndpoint
+from .catalog_endpoint import BatchResult, CatalogEndpoint, CatalogSnapshot
 from .checks_endpoint import ChecksEndpoint
-from .coordinate_endpoint import CoordinateEndpoint
-from .event_endpoint import EventEndpoint
+from .coordinate_endpoint import CoordinateEndpoint, CoordinateCache
+from .event_endpoint import EventEndpoint, EventStream
+from .fanout import Fanout, FanoutResult
 from .health_endpoint import HealthEndpoint
-from .kv_endpoint import KVEndpoint, KVOperations
-from .members_endpoint import MembersEndpoint
+from .kv_endpoint import KVEndpoint, KVOperations, KVMirror, KVTree
+from .kv_endpoint import KVTreeIterator, KVWriteBuffer
+from .members_endpoint import MembersEndpoint, MembershipTracker
 from .operator_endpoint import OperatorEndpoint
-from .query_endpoint import QueryEndpoint
+from .query_endpoint import QueryEndpoint, QueryCache
+from .reconciler import ServiceReconciler, ReconcileResult
 from .services_endpoint import ServicesEndpoint
 from .session_endpoint import SessionEndpoint
-from .status_endpoint import StatusEndpoint
+from .status_endpoint import StatusEndpoint, ClusterStatusMonitor
 
 __all__ = [
     "Consul",
     "ACLEndpoint",
+    "ACLEvaluator",
+    "ACLPolicy",
     "AgentEndpoint",
+    "BatchResult",
     "CatalogEndpoint",
+    "CatalogSnapshot",
     "ChecksEndpoint",
+    "ClusterStatusMonitor",
     "CoordinateEndpoint",
+    "CoordinateCache",
     "EventEndpoint",
+    "EventStream",
+    "Fanout",
+    "FanoutResult",
     "HealthEndpoint",
     "KVEndpoint",
     "KVOperations",
+    "KVMirror",
+    "KVTree",
+    "KVTreeIterator",
+    "KVWriteBuffer",
     "MembersEndpoint",
+    "MembershipTracker",
     "OperatorEndpoint",
     "QueryEndpoint",
+    "QueryCache",
+    "ReconcileResult",
     "ServicesEndpoint",
+    "ServiceReconciler",
     "SessionEndpoint",
     "StatusEndpoint"
 ]
@@ -1,8 +1,9 @@
-from .bases import EndpointBase
+from .bases import EndpointBase, Watcher
 from aioconsul.api import consul, extract_meta
 from aioconsul.encoders import encode_hcl, decode_hcl
 from aioconsul.exceptions import NotFound
 from aioconsul.util import extract_attr
+from collections.abc import Mapping
 
 
 class ACLEndpoint(EndpointBase):
@@ -104,11 +105,12 @@ class ACLEndpoint(EndpointBase):
 
     delete = destroy
 
-    async def info(self, token):
+    async def info(self, token, *, rules="decode"):
         """Queries the policy of a given token.
 
         Parameters:
             token (ObjectID): Token ID
+            rules (str): How **Rules** are decoded, see :meth:`items`
         Returns:
             ObjectMeta: where value is token
         Raises:
@@ -138,7 +140,7 @@ class ACLEndpoint(EndpointBase):
         response = await self._api.get("/v1/acl/info", token_id)
         meta = extract_meta(response.headers)
         try:
-            result = decode_token(response.body[0])
+            result = decode_token(response.body[0], rules=rules)
         except IndexError:
             raise NotFound(response.body, meta=meta)
         return consul(result, meta=meta)
@@ -165,12 +167,20 @@ class ACLEndpoint(EndpointBase):
         response = await self._api.put("/v1/acl/clone", token_id)
         return consul(response)
 
-    async def items(self):
+    async def items(self, *, rules="decode", watch=None, consistency=None):
         """Lists all the active tokens
 
+        Parameters:
+            rules (str): How **Rules** are decoded
+            watch (Blocking): Do a blocking query
+            consistency (Consistency): Force consistency
         Returns:
             ObjectMeta: where value is a list of tokens
 
+        **Rules** are parsed from HCL when rules is ``decode``. They are
+        parsed on first access when it is ``lazy``, and left as HCL text
+        when it is ``raw``.
+
         It returns a body like this::
 
             [
@@ -189,8 +199,10 @@ class ACLEndpoint(EndpointBase):
               }
             ]
         """
-        response = await self._api.get("/v1/acl/list")
-        results = [decode_token(r) for r in response.body]
+        response = await self._api.get("/v1/acl/list",
+                                       watch=watch,
+                                       consistency=consistency)
+        results = [decode_token(r, rules=rules) for r in response.body]
         return consul(results, meta=extract_meta(response.headers))
 
     async def replication(self, *, dc=None):
@@ -256,11 +268,223 @@ class ACLEndpoint(EndpointBase):
         response = await self._api.get("/v1/acl/replication", params=params)
         return response.body
 
+    def evaluator(self, *, default="deny", wait=None):
+        """Creates a local evaluator of token policies
+
+        Parameters:
+            default (str): ACL default policy of the cluster,
+                           ``allow`` or ``deny``
+            wait (Duration): Maximum duration of each blocking query
+        Returns:
+            ACLEvaluator: an evaluator
+        """
+        return ACLEvaluator(self, default=default, wait=wait)
+
+
+#: policy levels, each one grants the previous ones
+LEVELS = {"deny": 0, "read": 1, "write": 2}
+
+
+class PolicyTree:
+    """Finds the policy of the longest matching prefix
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, prefix, policy):
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = policy
+
+    def lookup(self, name):
+        """Returns the policy of the longest prefix of name, or ``None``
+        """
+        node = self.root
+        found = node.get(None)
+        for char in name:
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+
+class ACLPolicy:
+    """Compiled rules of a token
+
+    Parameters:
+        rules (Object): Decoded rules
+        management (bool): Token is a management token
+        default (str): Policy applied when no rule matches
+    """
+
+    #: resources whose rules are defined by name prefix
+    prefixed = ("agent", "event", "key", "node", "query", "service",
+                "session")
+
+    def __init__(self, rules=None, *, management=False, default="deny"):
+        self.management = management
+        self.default = default
+        self.trees = {}
+        self.policies = {}
+        for resource, value in (rules or {}).items():
+            if resource in self.prefixed or isinstance(value, dict):
+                tree = self.trees[resource] = PolicyTree()
+                for prefix, rule in value.items():
+                    tree.insert(prefix, rule["policy"])
+            else:
+                self.policies[resource] = value
+
+    def policy(self, resource, name=""):
+        """Returns the policy that applies to name
+
+        Parameters:
+            resource (str): One of ``agent``, ``event``, ``key``,
+                            ``node``, ``query``, ``service``, ``session``,
+                            ``keyring`` or ``operator``
+            name (str): Name of the resource
+        Returns:
+            str: ``deny``, ``read`` or ``write``
+        """
+        if self.management:
+            return "write"
+        tree = self.trees.get(resource)
+        if tree is not None:
+            policy = tree.lookup(name)
+        else:
+            policy = self.policies.get(resource)
+        if policy is None:
+            return "write" if self.default == "allow" else "deny"
+        return policy
+
+    def allowed(self, resource, name="", access="read"):
+        """Tells if access is granted to name
+
+        Parameters:
+            resource (str): One of ``agent``, ``event``, ``key``,
+                            ``node``, ``query``, ``service``, ``session``,
+                            ``keyring`` or ``operator``
+            name (str): Name of the resource
+            access (str): ``read`` or ``write``
+        Returns:
+            bool: ``True`` if access is granted
+        """
+        return LEVELS[self.policy(resource, name)] >= LEVELS[access]
+
+
+class ACLEvaluator(Watcher):
+    """Evaluates token permissions locally
+
+    Example::
+
+        evaluator = client.acl.evaluator(default="deny")
+        await evaluator.refresh()
+        evaluator.start()
+        if evaluator.allowed(token, "key", "private/foo", "write"):
+            ...
+
+    Tokens are listed with a management token, and their rules compiled
+    into prefix trees. Tokens sharing the same rules share the same policy.
+    :meth:`start` keeps them in sync with blocking queries.
+
+    Attributes:
+        policies (Mapping): Policies by token ID
+    """
+
+    def __init__(self, endpoint, *, default="deny", wait=None):
+        super().__init__(wait=wait)
+        self._endpoint = endpoint
+        self.default = default
+        self.policies = {}
+
+    async def fetch(self, *, watch=None):
+        return await self._endpoint.items(rules="raw", watch=watch)
+
+    def load(self, value):
+        compiled, policies = {}, {}
+        for token in value:
+            key = (token["Type"], token["Rules"])
+            if key not in compiled:
+                compiled[key] = ACLPolicy(
+                    decode_hcl(token["Rules"]),
+                    management=token["Type"] == "management",
+                    default=self.default)
+            policies[token["ID"]] = compiled[key]
+        self.policies = policies
+
+    def policy(self, token):
+        """Returns the policy of token
+
+        Parameters:
+            token (ObjectID): Token ID, anonymous token if ``None``
+        Returns:
+            ACLPolicy: the policy or ``None`` if token is unknown
+        """
+        token_id = extract_attr(token, keys=["ID"]) or "anonymous"
+        return self.policies.get(token_id)
+
+    def allowed(self, token, resource, name="", access="read"):
+        """Tells if token grants access to name
+
+        Parameters:
+            token (ObjectID): Token ID, anonymous token if ``None``
+            resource (str): One of ``agent``, ``event``, ``key``,
+                            ``node``, ``query``, ``service``, ``session``,
+                            ``keyring`` or ``operator``
+            name (str): Name of the resource
+            access (str): ``read`` or ``write``
+        Returns:
+            bool: ``True`` if access is granted, unknown tokens are denied
+        """
+        policy = self.policy(token)
+        return policy is not None and policy.allowed(resource, name, access)
+
+    def __repr__(self):
+        return "<%s(%r)>" % (self.__class__.__name__,
+                             str(self._endpoint._api.address))
+
+
+class LazyRules(Mapping):
+    """Rules parsed on first access
+
+    Attributes:
+        text (str): HCL rules
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = decode_hcl(self.text) or {}
+        return self._value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __repr__(self):
+        return "<%s(%r)>" % (self.__class__.__name__, self.text)
+
 
-def decode_token(token):
+def decode_token(token, *, rules="decode"):
     result = {}
     result.update(token)
-    result["Rules"] = decode_hcl(token["Rules"])
+    if rules == "decode":
+        result["Rules"] = decode_hcl(token["Rules"])
+    elif rules == "lazy":
+        result["Rules"] = LazyRules(token["Rules"])
+    elif rules != "raw":
+        raise ValueError("rules must be one of decode, lazy or raw")
     return result
 
 
@@ -268,6 +492,8 @@ def encode_token(token):
     result = {}
     result.update(token)
     rules = token.get("Rules")
-    if rules is not None and not isinstance(rules, str):
+    if isinstance(rules, LazyRules):
+        result["Rules"] = rules.text
+    elif rules is not None and not isinstance(rules, str):
         result["Rules"] = encode_hcl(rules)
     return result
@@ -1,3 +1,8 @@
+import asyncio
+import logging
+from aioconsul.common import read_state, write_state
+
+logger = logging.getLogger(__name__)
 
 
 class EndpointBase:
@@ -7,3 +12,150 @@ class EndpointBase:
 
     def __repr__(self):
         return "<%s(%r)>" % (self.__class__.__name__, str(self._api.address))
+
+
+class Watcher:
+    """Keeps a local state up to date with blocking queries.
+
+    Subclasses implement :meth:`fetch`, which queries the agent, and
+    :meth:`load`, which replaces the local state with the fetched value.
+
+    Attributes:
+        index (int): Last **Index** seen, ``None`` until loaded
+        wait (Duration): Maximum duration of each blocking query
+    """
+
+    #: seconds to wait before retrying a failed refresh
+    retry_delay = 1.
+
+    def __init__(self, *, wait=None, loop=None):
+        self.index = None
+        self.wait = wait
+        self.loop = loop
+        self._task = None
+
+    async def fetch(self, *, watch=None):
+        """Queries the agent
+
+        Parameters:
+            watch (Blocking): Do a blocking query
+        Returns:
+            Tuple[Object, Meta]: the value and its meta
+        """
+        raise NotImplementedError
+
+    def load(self, value):
+        """Replaces the local state by value"""
+        raise NotImplementedError
+
+    def dump(self):
+        """Returns the local state, as it would be given to :meth:`load`"""
+        raise NotImplementedError
+
+    def save(self, path):
+        """Writes the local state and its index to path
+
+        Parameters:
+            path (str): File path
+        """
+        write_state(path, {"Index": self.index, "Value": self.dump()})
+
+    def restore(self, path):
+        """Loads the local state and its index from path
+
+        Parameters:
+            path (str): File path
+        Returns:
+            bool: ``True`` if restored, ``False`` if path does not exist
+
+        Once restored, the next :meth:`refresh` is a blocking query
+        resuming from the saved index instead of a full read, so a
+        snapshot that is still current costs nothing to the servers.
+        """
+        try:
+            state = read_state(path)
+        except FileNotFoundError:
+            return False
+        index = state["Index"]
+        self.load(state["Value"])
+        self.index = tuple(index) if isinstance(index, list) else index
+        return True
+
+    async def refresh(self):
+        """Loads the state, or waits for it to change once it is loaded
+
+        Returns:
+            bool: ``True`` if the local state changed
+        """
+        watch = None
+        if self.index is not None:
+            watch = (self.index, self.wait)
+        value, meta = await self.fetch(watch=watch)
+        index = meta.get("Index")
+        if index is not None and index == self.index:
+            return False
+        self.load(value)
+        self.index = index
+        return True
+
+    async def run(self):
+        """Refreshes the state until cancelled"""
+        attempt = 0
+        while True:
+            try:
+                changed = await self.refresh()
+                attempt = 0
+                await self.pause(changed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning("%r failed to refresh: %s", self, error)
+                attempt += 1
+                self._emit("on_retry", self, attempt=attempt, error=error)
+                await asyncio.sleep(self.retry_delay)
+
+    def _get_api(self):
+        return getattr(getattr(self, "_endpoint", None), "_api", None)
+
+    def _emit(self, event, *args, **kwargs):
+        api = self._get_api()
+        if getattr(api, "hooks", None):
+            api.emit(event, *args, **kwargs)
+
+    async def pause(self, changed):
+        """Waits before the next refresh of :meth:`run`
+
+        Blocking queries wait by themselves, but polling watchers
+        override it.
+
+        Parameters:
+            changed (bool): ``True`` if the last refresh changed the state
+        """
+
+    def start(self):
+        """Runs the watcher in background, until stopped or until the
+        client is closed
+
+        Returns:
+            asyncio.Task: the running task
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run(), loop=self.loop)
+            watchers = getattr(self._get_api(), "watchers", None)
+            if watchers is not None:
+                watchers.add(self)
+        return self._task
+
+    async def stop(self):
+        """Stops the background watcher"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
@@ -1,7 +1,14 @@
-from .bases import EndpointBase
+import asyncio
+import logging
+from .bases import EndpointBase, Watcher
 from .util import prepare_node, prepare_service, prepare_check
+from .util import content_hash
 from aioconsul.api import consul
+from aioconsul.common import TokenBucket
 from aioconsul.util import extract_attr
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
 
 
 class CatalogEndpoint(EndpointBase):
@@ -141,6 +148,12 @@ class CatalogEndpoint(EndpointBase):
         node_id, node = prepare_node(node)
         service_id, service = prepare_service(service)
         _, check = prepare_check(check)
+        return await self._register(node_id, node, service_id, service,
+                                    check, write_token)
+
+    async def _register(self, node_id, node, service_id, service, check,
+                        write_token):
+        """Registers the parts of an entry, once prepared"""
         if check and node_id:
             check["Node"] = node_id
         if check and service_id:
@@ -158,6 +171,68 @@ class CatalogEndpoint(EndpointBase):
         response = await self._api.put("/v1/catalog/register", data=entry)
         return response.status == 200
 
+    async def register_many(self, entries, *, concurrency=16, rate=None,
+                            snapshot=None, write_token=None):
+        """Registers many nodes, services or checks
+
+        Parameters:
+            entries (Collection): Bodies as described in :meth:`register`,
+                                  where **Service** and **Check** are
+                                  nested into the node definition
+            concurrency (int): Maximum number of concurrent registrations
+            rate (float): Maximum number of registrations per second
+            snapshot (CatalogSnapshot): Skips entries already registered
+            write_token (ObjectID): Token ID
+        Returns:
+            BatchResult: per entry, ``True`` on success, ``None`` if
+                         skipped, or the raised exception
+
+        Entries of /v1/health/service/<service> are accepted too, and
+        register their node, service and checks.
+
+        With a snapshot, an entry whose node and service are registered
+        with the same fields is skipped. Entries with checks are always
+        registered, since the catalog does not list them along services.
+        """
+        registered = _registered(snapshot) if snapshot else {}
+
+        async def register(entry):
+            node_id, node = prepare_node(entry)
+            node = dict(node)
+            if _is_health(entry):
+                service = entry["Service"]
+                node["Checks"] = [prepare_check(check)[1]
+                                  for check in entry["Checks"]]
+            else:
+                service = node.pop("Service", None)
+            service_id, service = prepare_service(service)
+            _, check = prepare_check(node.pop("Check", None))
+            key = node_id, service_id or service.get("Service")
+            if not check and not node.get("Checks") and \
+                    registered.get(key) == _fingerprint(node, service):
+                return None
+            return await self._register(node_id, node, service_id, service,
+                                        check, write_token)
+        return await _batch(register, entries, concurrency, rate)
+
+    async def deregister_many(self, entries, *, concurrency=16, rate=None,
+                              write_token=None):
+        """Deregisters many nodes, services or checks
+
+        Parameters:
+            entries (Collection): Bodies or node IDs, as described in
+                                  :meth:`deregister`
+            concurrency (int): Maximum number of concurrent deregistrations
+            rate (float): Maximum number of deregistrations per second
+            write_token (ObjectID): Token ID
+        Returns:
+            BatchResult: per entry, ``True`` on success,
+                         or the raised exception
+        """
+        async def deregister(entry):
+            return await self.deregister(entry, write_token=write_token)
+        return await _batch(deregister, entries, concurrency, rate)
+
     async def deregister_node(self, node):
         """Deregisters a node
 
@@ -446,3 +521,294 @@ class CatalogEndpoint(EndpointBase):
                                        watch=watch,
                                        consistency=consistency)
         return consul(response)
+
+    def snapshot(self, *, dc=None, wait=None, concurrency=8):
+        """Creates a local snapshot of the catalog
+
+        Parameters:
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            wait (Duration): Maximum duration of each blocking query
+            concurrency (int): Maximum number of services fetched at once
+        Returns:
+            CatalogSnapshot: a snapshot object
+        """
+        return CatalogSnapshot(self, dc=dc, wait=wait,
+                               concurrency=concurrency)
+
+
+class CatalogSnapshot(Watcher):
+    """Indexed local copy of the catalog
+
+    Example::
+
+        snapshot = client.catalog.snapshot()
+        await snapshot.refresh()
+        entries = snapshot.query(service="redis",
+                                 tag="master",
+                                 meta={"rack": "z"})
+
+    The whole catalog is loaded by :meth:`refresh`, then kept up to date in
+    background with :meth:`start`. Only nodes and the list of services are
+    watched, with two blocking queries that stay open until :meth:`stop`.
+    When the list of services moves, the services that disappeared are
+    dropped, and the ones that appeared or whose tags changed are fetched.
+    If the latest index of these services does not account for the change,
+    for instance when instances of a service come or go, every service is
+    fetched again. Services are fetched with at most ``concurrency``
+    requests at once.
+
+    Entries are the objects returned by :meth:`CatalogEndpoint.service`.
+    They are indexed by service, node, tag, address and node meta, so
+    :meth:`query` does not scan the catalog.
+
+    Attributes:
+        nodes (Mapping): Nodes by name
+        entries (Collection): Service entries
+    """
+
+    def __init__(self, endpoint, *, dc=None, wait=None, concurrency=8):
+        super().__init__(wait=wait)
+        self._endpoint = endpoint
+        self.dc = dc
+        self.concurrency = concurrency
+        self._watches = {}
+        self.load({"Nodes": [], "Services": {}, "Indexes": {}})
+
+    async def fetch(self, *, watch=None):
+        if watch is None:
+            nodes, nodes_meta = await self._endpoint.nodes(dc=self.dc)
+            services, meta = await self._endpoint.services(dc=self.dc)
+            value = {"Nodes": nodes, "Services": {}, "Indexes": {}}
+            await self._fetch_services(value, list(services))
+            index = (nodes_meta.get("Index"), meta.get("Index"))
+            return value, dict(meta, Index=index)
+        index, wait = watch
+        results = await self._watch(index, wait)
+        value = dict(self.value,
+                     Services=dict(self.value["Services"]),
+                     Indexes=dict(self.value.get("Indexes") or {}))
+        nodes_index, services_index = index[:2]
+        meta = {}
+        if "nodes" in results:
+            value["Nodes"], meta = results["nodes"]
+            nodes_index = meta.get("Index")
+        if "services" in results:
+            services, meta = results["services"]
+            services_index = meta.get("Index")
+            if services_index != index[1]:
+                await self._update_services(value, services, services_index)
+        return value, dict(meta, Index=(nodes_index, services_index))
+
+    async def stop(self):
+        """Stops the background watcher and its blocking queries"""
+        await super().stop()
+        watches, self._watches = self._watches, {}
+        for task in watches.values():
+            task.cancel()
+
+    async def _watch(self, index, wait):
+        """Waits for the nodes or the list of services to move
+
+        Returns:
+            Mapping: results of the blocking queries that completed
+        Raises:
+            Exception: the error of a query, when none succeeded
+        """
+        calls = {"nodes": (self._endpoint.nodes, index[0]),
+                 "services": (self._endpoint.services, index[1])}
+        for key, (func, position) in calls.items():
+            if key not in self._watches:
+                self._watches[key] = asyncio.ensure_future(
+                    func(dc=self.dc, watch=(position, wait)))
+        await asyncio.wait(list(self._watches.values()),
+                           return_when=asyncio.FIRST_COMPLETED)
+        results, errors = {}, []
+        for key, task in list(self._watches.items()):
+            if not task.done():
+                continue
+            del self._watches[key]
+            try:
+                results[key] = task.result()
+            except Exception as error:
+                logger.warning("%r failed to watch %s: %s", self, key, error)
+                errors.append(error)
+        if errors and not results:
+            raise errors[0]
+        return results
+
+    async def _update_services(self, value, services, index):
+        """Applies a new list of services to value"""
+        for name in set(value["Services"]).difference(services):
+            del value["Services"][name]
+            value["Indexes"].pop(name, None)
+        current = value["Services"]
+        changed = [name for name, tags in services.items()
+                   if name not in current or _retagged(current[name], tags)]
+        await self._fetch_services(value, changed)
+        latest = [value["Indexes"][name] or 0 for name in changed]
+        if not latest or max(latest) != index:
+            # the change is elsewhere, like instances of a service
+            await self._fetch_services(value, [
+                name for name in services if name not in changed
+            ])
+
+    async def _fetch_services(self, value, names):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_service(name):
+            async with semaphore:
+                return await self._endpoint.service(name, dc=self.dc)
+
+        results = await asyncio.gather(*[
+            fetch_service(name) for name in names
+        ])
+        for name, (entries, meta) in zip(names, results):
+            value["Services"][name] = entries
+            value["Indexes"][name] = meta.get("Index")
+
+    def load(self, value):
+        self.value = value
+        self.nodes = {node["Node"]: node for node in value["Nodes"]}
+        self.entries = []
+        self._indexes = indexes = defaultdict(lambda: defaultdict(set))
+        for name, entries in value["Services"].items():
+            for entry in entries:
+                position = len(self.entries)
+                self.entries.append(entry)
+                node = self.nodes.get(entry["Node"]) or {}
+                meta = entry.get("NodeMeta") or node.get("Meta") or {}
+                address = entry.get("ServiceAddress") or entry["Address"]
+                indexes["service"][name].add(position)
+                indexes["node"][entry["Node"]].add(position)
+                indexes["address"][address].add(position)
+                for tag in entry.get("ServiceTags") or ():
+                    indexes["tag"][tag].add(position)
+                for item in meta.items():
+                    indexes["meta"][item].add(position)
+
+    def dump(self):
+        return self.value
+
+    @property
+    def services(self):
+        """Mapping: Tags of services, like :meth:`CatalogEndpoint.services`
+        """
+        return {name: _tags(entries)
+                for name, entries in self.value["Services"].items()}
+
+    def query(self, *, service=None, node=None, tag=None,
+              address=None, meta=None):
+        """Queries service entries
+
+        Parameters:
+            service (str): Service name
+            node (str): Node name
+            tag (Union[str, List[str]]): Tag or tags that entries must have
+            address (str): Service address, or node address when the service
+                           does not define one
+            meta (Mapping): Node meta that entries must have
+        Returns:
+            Collection: matching entries, in catalog order
+        """
+        tags = [tag] if isinstance(tag, str) else tag or []
+        criteria = [("service", service), ("node", node),
+                    ("address", address)]
+        criteria = [(k, v) for k, v in criteria if v is not None]
+        criteria += [("tag", t) for t in tags]
+        criteria += [("meta", item) for item in (meta or {}).items()]
+        if not criteria:
+            return list(self.entries)
+        positions = sorted((self._indexes[k].get(v, set())
+                            for k, v in criteria), key=len)
+        result = set(positions[0]).intersection(*positions[1:])
+        return [self.entries[i] for i in sorted(result)]
+
+    def __repr__(self):
+        return "<%s(%r, dc=%r)>" % (self.__class__.__name__,
+                                    str(self._endpoint._api.address),
+                                    self.dc)
+
+
+class BatchResult(list):
+    """Results of a batch, in the order of its entries
+
+    Each result is the value returned for the entry, or the exception
+    raised, like :func:`asyncio.gather` with ``return_exceptions``.
+    """
+
+    @property
+    def errors(self):
+        """Mapping: Exceptions raised, by position of entry"""
+        return {i: value for i, value in enumerate(self)
+                if isinstance(value, BaseException)}
+
+    @property
+    def failed(self):
+        """bool: ``True`` if at least one entry failed"""
+        return any(isinstance(value, BaseException) for value in self)
+
+
+async def _batch(func, entries, concurrency, rate):
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate) if rate else None
+
+    async def call(entry):
+        async with semaphore:
+            if bucket:
+                await bucket.acquire()
+            return await func(entry)
+
+    return BatchResult(await asyncio.gather(*[
+        call(entry) for entry in entries
+    ], return_exceptions=True))
+
+
+def _fingerprint(node, service=None):
+    """Hashes the fields of node and service given for registration"""
+    fields = {k: node[k] for k in ("Node", "Address", "TaggedAddresses")
+              if node.get(k)}
+    # registered as NodeMeta, listed as Meta
+    if node.get("NodeMeta") or node.get("Meta"):
+        fields["Meta"] = node.get("NodeMeta") or node.get("Meta")
+    if service:
+        fields["Service"] = {k: v for k, v in service.items() if v}
+        fields["Service"].setdefault("ID", service.get("Service"))
+        if service.get("Tags"):
+            fields["Service"]["Tags"] = sorted(service["Tags"])
+    return content_hash(fields)
+
+
+def _is_health(entry):
+    """Tells if entry comes from /v1/health/service/<service>"""
+    return isinstance(entry, dict) and "Checks" in entry and \
+        "Service" in entry and "Node" in entry
+
+
+def _registered(snapshot):
+    """Fingerprints of the node and service entries of snapshot"""
+    result = {(name, None): _fingerprint(node)
+              for name, node in snapshot.nodes.items()}
+    for entry in snapshot.entries:
+        node = snapshot.nodes.get(entry["Node"])
+        if node is not None:
+            result[entry["Node"], entry["ServiceID"]] = _fingerprint(node, {
+                "ID": entry["ServiceID"],
+                "Service": entry["ServiceName"],
+                "Tags": entry.get("ServiceTags"),
+                "Address": entry.get("ServiceAddress"),
+                "Port": entry.get("ServicePort")
+            })
+    return result
+
+
+def _tags(entries):
+    """Sorted tags of service entries"""
+    return sorted(set(tag
+                      for entry in entries
+                      for tag in entry.get("ServiceTags") or ()))
+
+
+def _retagged(entries, tags):
+    """Tells if tags listed for a service differ from its entries"""
+    return _tags(entries) != sorted(set(tags or ()))
@@ -6,11 +6,13 @@ from .catalog_endpoint import CatalogEndpoint
 from .checks_endpoint import ChecksEndpoint
 from .coordinate_endpoint import CoordinateEndpoint
 from .event_endpoint import EventEndpoint
+from .fanout import Fanout
 from .health_endpoint import HealthEndpoint
 from .kv_endpoint import KVEndpoint
 from .members_endpoint import MembersEndpoint
 from .operator_endpoint import OperatorEndpoint
 from .query_endpoint import QueryEndpoint
+from .reconciler import ServiceReconciler
 from .services_endpoint import ServicesEndpoint
 from .session_endpoint import SessionEndpoint
 from .status_endpoint import StatusEndpoint
@@ -19,18 +21,36 @@ __all__ = ["Consul"]
 
 
 class Consul:
+    """Client of a Consul agent
 
-    def __init__(self, address, *, token=None, consistency=None, loop=None):
+    Connections are opened by the first request, and closed by
+    :meth:`close` or at the end of an ``async with`` block::
+
+        async with Consul("127.0.0.1:8500") as client:
+            value, meta = await client.kv.get("foo")
+    """
+
+    def __init__(self, address, *, token=None, consistency=None, loop=None,
+                 hooks=None):
         self.api = API(address,
                        token=token,
                        consistency=consistency,
-                       loop=loop)
+                       loop=loop,
+                       hooks=hooks)
+
+    async def close(self, *, timeout=1.):
+        """Stops watchers, then closes connections
 
-    def close(self):
-        if self.api:
-            self.api.close()
+        Parameters:
+            timeout (float): Maximum seconds to wait for requests in flight
+        """
+        await self.api.close(timeout=timeout)
 
-    __del__ = close
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
 
     @property
     def address(self):
@@ -52,6 +72,30 @@ class Consul:
     def consistency(self):
         return self.api.consistency
 
+    def fanout(self, dcs=None, *, concurrency=None, timeout=None):
+        """Queries several datacenters concurrently
+
+        Parameters:
+            dcs (List[str]): Datacenters to query.
+                             Defaults to all the known datacenters.
+            concurrency (int): Maximum number of concurrent calls
+            timeout (float): Timeout of each datacenter call, in seconds
+        Returns:
+            Fanout: exposes endpoints that are called once per datacenter
+        """
+        return Fanout(self, dcs, concurrency=concurrency, timeout=timeout)
+
+    def reconciler(self, *, concurrency=8, prune=False):
+        """Converges local services and checks to a desired set
+
+        Parameters:
+            concurrency (int): Maximum number of concurrent registrations
+            prune (bool): Deregister services and checks that are not desired
+        Returns:
+            ServiceReconciler: a reconciler, which remembers what it applied
+        """
+        return ServiceReconciler(self, concurrency=concurrency, prune=prune)
+
     @cached_property
     def acl(self):
         return ACLEndpoint(self.api)
@@ -1,5 +1,13 @@
-from .bases import EndpointBase
+from .bases import EndpointBase, Watcher
 from aioconsul.api import consul
+from collections.abc import Mapping
+from math import sqrt
+from statistics import median
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
 
 
 class CoordinateEndpoint(EndpointBase):
@@ -83,3 +91,229 @@ class CoordinateEndpoint(EndpointBase):
                                        watch=watch,
                                        consistency=consistency)
         return consul(response)
+
+    def cache(self, *, dc=None, wait=None):
+        """Creates a local cache of LAN coordinates
+
+        Parameters:
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            wait (Duration): Maximum duration of each blocking query
+        Returns:
+            CoordinateCache: a cache object
+        """
+        return CoordinateCache(self, dc=dc, wait=wait)
+
+
+class CoordinateCache(Watcher):
+    """Estimates round trip times locally from network coordinates
+
+    Once loaded, nodes can be sorted by estimated round trip time without
+    asking the servers to do it with the ``near`` parameter::
+
+        cache = client.coordinate.cache()
+        await cache.refresh()
+        nodes, meta = await client.health.service("redis")
+        nodes = cache.sort(nodes, near="my-node")
+
+    It can be kept up to date in background with :meth:`start`.
+
+    Attributes:
+        coordinates (Mapping): LAN coordinates by node name
+        datacenters (Mapping): WAN coordinates of servers by datacenter
+    """
+
+    def __init__(self, endpoint, *, dc=None, wait=None):
+        super().__init__(wait=wait)
+        self._endpoint = endpoint
+        self.dc = dc
+        self.coordinates = {}
+        self.datacenters = {}
+
+    async def fetch(self, *, watch=None):
+        return await self._endpoint.nodes(dc=self.dc, watch=watch)
+
+    def load(self, value):
+        self.coordinates = {obj["Node"]: obj["Coord"] for obj in value}
+
+    def dump(self):
+        return [{"Node": node, "Coord": coord}
+                for node, coord in self.coordinates.items()]
+
+    async def load_datacenters(self):
+        """Fetches the WAN coordinates of Consul servers"""
+        datacenters = await self._endpoint.datacenters()
+        self.datacenters = {
+            dc: [obj["Coord"] for obj in data["Coordinates"]]
+            for dc, data in datacenters.items()
+        }
+
+    def rtt(self, a, b):
+        """Estimates round trip time between two nodes
+
+        Parameters:
+            a (str): Node name
+            b (str): Node name
+        Returns:
+            float: estimated round trip time in seconds,
+                   or ``None`` if a coordinate is unknown
+        """
+        try:
+            return rtt(self.coordinates[a], self.coordinates[b])
+        except KeyError:
+            return None
+
+    def matrix(self, nodes=None):
+        """Estimates round trip times between all nodes
+
+        Parameters:
+            nodes (Collection): Node names or objects.
+                                Defaults to all known nodes.
+        Returns:
+            Tuple[List[str], Matrix]: node names and their N×N matrix of
+                                      round trip times in seconds
+        Raises:
+            KeyError: a node coordinate is unknown
+
+        The matrix is a ``numpy.ndarray`` when NumPy is installed,
+        otherwise a list of lists.
+        """
+        if nodes is None:
+            names = sorted(self.coordinates)
+        else:
+            names = [node_name(obj) for obj in nodes]
+        coords = [self.coordinates[name] for name in names]
+        return names, rtt_matrix(coords, coords)
+
+    def sort(self, items, *, near):
+        """Sorts items by estimated round trip time from a node
+
+        Parameters:
+            items (Collection): Node names or objects such as returned
+                                by catalog and health endpoints
+            near (str): Node name
+        Returns:
+            Collection: items sorted in ascending order, items whose
+                        coordinate is unknown come last
+        Raises:
+            KeyError: coordinate of near is unknown
+
+        It mimics the ``near`` parameter of catalog and health endpoints.
+        """
+        origin = self.coordinates[node_name(near)]
+        known, unknown = [], []
+        for obj in items:
+            coord = self.coordinates.get(node_name(obj))
+            if coord is None:
+                unknown.append(obj)
+            else:
+                known.append((obj, coord))
+        if not known:
+            return unknown
+        distances = rtt_matrix([origin], [coord for _, coord in known])[0]
+        order = sorted(range(len(known)), key=distances.__getitem__)
+        return [known[i][0] for i in order] + unknown
+
+    def sort_datacenters(self, source):
+        """Sorts datacenters by estimated round trip time from source
+
+        Parameters:
+            source (str): Datacenter name
+        Returns:
+            List[str]: datacenter names in ascending order,
+                       source comes first
+        Raises:
+            KeyError: source is not loaded
+
+        The distance between two datacenters is the median of the round
+        trip times between their servers. :meth:`load_datacenters` must
+        have been awaited first.
+        """
+        origin = self.datacenters[source]
+        distances = {
+            dc: 0. if dc == source else datacenter_rtt(origin, coords)
+            for dc, coords in self.datacenters.items()
+        }
+        return sorted(distances, key=lambda dc: (distances[dc], dc))
+
+    def __contains__(self, node):
+        return node_name(node) in self.coordinates
+
+    def __repr__(self):
+        return "<%s(%r, dc=%r)>" % (self.__class__.__name__,
+                                    str(self._endpoint._api.address),
+                                    self.dc)
+
+
+def node_name(obj):
+    """Extracts node name from an object returned by catalog or health"""
+    if isinstance(obj, Mapping):
+        obj = obj["Node"]
+        if isinstance(obj, Mapping):
+            obj = obj["Node"]
+    return obj
+
+
+def rtt(a, b):
+    """Estimates round trip time between two coordinates
+
+    Parameters:
+        a (Object): Coordinate, such as **Coord** of a node
+        b (Object): Coordinate, such as **Coord** of a node
+    Returns:
+        float: estimated round trip time in seconds
+    """
+    dist = sqrt(sum((x - y) ** 2 for x, y in zip(a["Vec"], b["Vec"])))
+    dist += a["Height"] + b["Height"]
+    adjusted = dist + a["Adjustment"] + b["Adjustment"]
+    return adjusted if adjusted > 0 else dist
+
+
+def rtt_matrix(a, b):
+    """Estimates round trip times between two lists of coordinates
+
+    Parameters:
+        a (List[Object]): Coordinates
+        b (List[Object]): Coordinates
+    Returns:
+        Matrix: a len(a)×len(b) matrix of round trip times in seconds
+
+    The matrix is a ``numpy.ndarray`` when NumPy is installed,
+    otherwise a list of lists.
+    """
+    if numpy is None:
+        return [[rtt(x, y) for y in b] for x in a]
+    if not a or not b:
+        return numpy.zeros((len(a), len(b)))
+    va, ha, aa = _arrays(a)
+    vb, hb, ab = _arrays(b)
+    # |x - y|² = |x|² + |y|² - 2 x.y keeps memory in O(len(a) × len(b))
+    norms_a = (va ** 2).sum(axis=1)[:, None]
+    norms_b = (vb ** 2).sum(axis=1)[None, :]
+    squares = norms_a + norms_b - 2 * va.dot(vb.T)
+    dist = numpy.sqrt(numpy.maximum(squares, 0))
+    dist += ha[:, None] + hb[None, :]
+    adjusted = dist + aa[:, None] + ab[None, :]
+    return numpy.where(adjusted > 0, adjusted, dist)
+
+
+def _arrays(coords):
+    vec = numpy.array([c["Vec"] for c in coords], dtype=float)
+    height = numpy.array([c["Height"] for c in coords], dtype=float)
+    adjustment = numpy.array([c["Adjustment"] for c in coords], dtype=float)
+    return vec.reshape(len(coords), -1), height, adjustment
+
+
+def datacenter_rtt(a, b):
+    """Estimates round trip time between two sets of servers
+
+    Parameters:
+        a (List[Object]): Coordinates of the first datacenter servers
+        b (List[Object]): Coordinates of the second datacenter servers
+    Returns:
+        float: median of round trip times between servers, in seconds
+    """
+    matrix = rtt_matrix(a, b)
+    if numpy is not None:
+        return float(numpy.median(matrix))
+    return median(x for row in matrix for x in row)
@@ -3,6 +3,8 @@ from .bases import EndpointBase
 from aioconsul.api import consul, extract_meta
 from aioconsul.encoders import decode_value, encode_value
 from aioconsul.util import extract_pattern
+from collections import deque, OrderedDict
+from functools import lru_cache
 
 
 class EventEndpoint(EndpointBase):
@@ -83,6 +85,101 @@ class EventEndpoint(EndpointBase):
         results = [format_event(data) for data in response.body]
         return consul(results, meta=extract_meta(response.headers))
 
+    def stream(self, name=None, *, wait=None, history=False):
+        """Iterates over new events
+
+        Parameters:
+            name (str): Filter events by name.
+            wait (Duration): Maximum duration of each blocking query
+            history (bool): Also yield the events already known by the agent
+        Returns:
+            EventStream: an async iterator of events
+        """
+        return EventStream(self, name, wait=wait, history=history)
+
+
+class EventStream:
+    """Async iterator of the events fired after its creation
+
+    Example::
+
+        async for event in client.event.stream("deploy"):
+            print(event["ID"], event["Payload"])
+
+    Each blocking query returns the whole buffer of the agent, this stream
+    yields only events not yielded yet, ordered by **LTime** then **ID**.
+
+    Events are deduplicated by **ID**. Only the last ``size`` IDs are
+    remembered, events older than the forgotten ones are dropped, so an
+    agent that restarts or resyncs its buffer does not replay history.
+
+    Attributes:
+        index (int): Last **Index** seen, ``None`` until first query
+    """
+
+    #: number of event IDs remembered
+    size = 1024
+
+    def __init__(self, endpoint, name=None, *, wait=None, history=False):
+        self._endpoint = endpoint
+        self.name = name
+        self.wait = wait
+        self.history = history
+        self.index = None
+        self._seen = OrderedDict()
+        self._floor = None
+        self._pending = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._pending:
+            await self.poll()
+        return self._pending.popleft()
+
+    async def poll(self):
+        """Queries the agent once
+
+        Returns:
+            Collection: the new events
+        """
+        watch = None
+        if self.index is not None:
+            watch = (self.index, self.wait)
+        events, meta = await self._endpoint.items(self.name, watch=watch)
+        initial, self.index = self.index is None, meta.get("Index")
+        events = [obj for obj in events if self._is_new(obj)]
+        events.sort(key=lambda obj: (obj["LTime"], obj["ID"]))
+        for obj in events:
+            self._remember(obj)
+        if initial and not self.history:
+            return []
+        self._pending.extend(events)
+        return events
+
+    def _is_new(self, obj):
+        if obj["ID"] in self._seen:
+            return False
+        return self._floor is None or obj["LTime"] > self._floor
+
+    def _remember(self, obj):
+        self._seen[obj["ID"]] = obj["LTime"]
+        while len(self._seen) > self.size:
+            _, ltime = self._seen.popitem(last=False)
+            self._floor = max(ltime, self._floor or ltime)
+
+    def __repr__(self):
+        return "<%s(%r, name=%r)>" % (self.__class__.__name__,
+                                      str(self._endpoint._api.address),
+                                      self.name)
+
+
+@lru_cache(maxsize=256)
+def compile_filter(pattern):
+    """Compiles event filters, which are mostly the same"""
+    return re.compile(pattern)
+
 
 def format_event(obj):
     result = {}
@@ -90,5 +187,5 @@ def format_event(obj):
     if obj["Payload"] is not None:
         result["Payload"] = decode_value(obj["Payload"])
     for key in ("NodeFilter", "ServiceFilter", "TagFilter"):
-        result[key] = re.compile(obj[key]) if obj.get(key) else None
+        result[key] = compile_filter(obj[key]) if obj.get(key) else None
     return result
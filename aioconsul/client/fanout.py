@@ -0,0 +1,115 @@
+import asyncio
+from .bases import EndpointBase
+
+__all__ = ["Fanout", "FanoutResult"]
+
+
+class FanoutResult(dict):
+    """Results of a fan-out call, by datacenter
+
+    Attributes:
+        errors (Mapping): Exceptions raised, by datacenter
+    """
+
+    def __init__(self, *args, errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = errors or {}
+
+    @property
+    def failed(self):
+        """bool: ``True`` if at least one datacenter failed"""
+        return bool(self.errors)
+
+    def __repr__(self):
+        return "<%s(%s, errors=%r)>" % (self.__class__.__name__,
+                                        dict.__repr__(self),
+                                        sorted(self.errors))
+
+
+class Fanout:
+    """Calls endpoints of several datacenters concurrently
+
+    Example::
+
+        results = await client.fanout().catalog.services()
+        for dc, (services, meta) in results.items():
+            print(dc, services)
+        for dc, error in results.errors.items():
+            print(dc, "failed", error)
+
+    Any endpoint method accepting a ``dc`` parameter can be called, it is
+    called once per datacenter and results are tagged by datacenter.
+    Datacenters that fail or time out are reported into ``errors`` instead
+    of failing the whole call.
+
+    Parameters:
+        client (Consul): the client
+        dcs (List[str]): Datacenters to query.
+                         Defaults to all the known datacenters.
+        concurrency (int): Maximum number of concurrent calls
+        timeout (float): Timeout of each datacenter call, in seconds
+    """
+
+    def __init__(self, client, dcs=None, *, concurrency=None, timeout=None):
+        self._client = client
+        self.dcs = dcs
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def run(self, func):
+        """Calls func for each datacenter
+
+        Parameters:
+            func (Callable[[str], Awaitable]): called with datacenter name
+        Returns:
+            FanoutResult: results by datacenter
+        """
+        dcs = self.dcs
+        if dcs is None:
+            dcs = await self._client.catalog.datacenters()
+        semaphore = asyncio.Semaphore(self.concurrency or len(dcs) or 1)
+
+        async def call(dc):
+            async with semaphore:
+                return await asyncio.wait_for(func(dc), self.timeout)
+
+        values = await asyncio.gather(*[call(dc) for dc in dcs],
+                                      return_exceptions=True)
+        result = FanoutResult()
+        for dc, value in zip(dcs, values):
+            if isinstance(value, BaseException):
+                result.errors[dc] = value
+            else:
+                result[dc] = value
+        return result
+
+    def __getattr__(self, name):
+        endpoint = getattr(self._client, name)
+        if not isinstance(endpoint, EndpointBase):
+            raise AttributeError(name)
+        return FanoutEndpoint(self, endpoint)
+
+    def __repr__(self):
+        return "<%s(%r, dcs=%r)>" % (self.__class__.__name__,
+                                     str(self._client.address),
+                                     self.dcs)
+
+
+class FanoutEndpoint:
+
+    def __init__(self, fanout, endpoint):
+        self._fanout = fanout
+        self._endpoint = endpoint
+
+    def __getattr__(self, name):
+        method = getattr(self._endpoint, name)
+
+        async def call(*args, **kwargs):
+            return await self._fanout.run(
+                lambda dc: method(*args, dc=dc, **kwargs))
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    def __repr__(self):
+        return "<%s(%r)>" % (self.__class__.__name__, self._endpoint)
@@ -1,9 +1,15 @@
-from .bases import EndpointBase
+import asyncio
+import logging
+import random
+from .bases import EndpointBase, Watcher
+from collections import Counter, deque
 from aioconsul.api import consul, extract_meta
-from aioconsul.encoders import decode_value, encode_value
-from aioconsul.exceptions import ConflictError, TransactionError
+from aioconsul.encoders import BYTES_LIKE, decode_value, encode_value
+from aioconsul.exceptions import ConflictError, NotFound, TransactionError
 from aioconsul.util import extract_attr
 
+logger = logging.getLogger(__name__)
+
 
 class ReadMixin:
 
@@ -14,7 +20,8 @@ class ReadMixin:
                     separator=None,
                     keys=None,
                     watch=None,
-                    consistency=None):
+                    consistency=None,
+                    sink=None):
         """Returns the specified key
 
         Parameters:
@@ -22,6 +29,7 @@ class ReadMixin:
                       Defaults to the agent's local datacenter.
             watch (Blocking): Do a blocking query
             consistency (Consistency): Force consistency
+            sink (Union[bytearray, memoryview, Callable]): Stream body into
         """
         response = await self._api.get(
             "/v1/kv", path,
@@ -33,7 +41,8 @@ class ReadMixin:
                 "keys": keys
             },
             watch=watch,
-            consistency=consistency)
+            consistency=consistency,
+            sink=sink)
         return response
 
     async def keys(self, prefix, *,
@@ -119,7 +128,8 @@ class ReadMixin:
         result["Value"] = decode_value(result["Value"], result["Flags"])
         return consul(result, meta=extract_meta(response.headers))
 
-    async def raw(self, key, *, dc=None, watch=None, consistency=None):
+    async def raw(self, key, *,
+                  dc=None, watch=None, consistency=None, into=None):
         """Returns the specified key
 
         Parameters:
@@ -128,14 +138,30 @@ class ReadMixin:
                       Defaults to the agent's local datacenter.
             watch (Blocking): Do a blocking query
             consistency (Consistency): Force consistency
+            into (Union[bytearray, memoryview, Callable]): Stream value into
         Returns:
-            ObjectMeta: where value is the raw value
+            ObjectMeta: where value is the raw value,
+                        or its size when streamed
+        Raises:
+            ValueError: value does not fit into buffer
+
+        Without **into**, the whole value is buffered in memory.
+        Large values are better streamed, either into a preallocated
+        writable buffer, or chunk by chunk to a function, which may
+        be a coroutine::
+
+            buf = bytearray(size)
+            size, meta = await client.kv.raw("blob", into=buf)
+
+            with open("blob", "wb") as file:
+                await client.kv.raw("blob", into=file.write)
         """
         response = await self._read(key,
                                     dc=dc,
                                     raw=True,
                                     watch=watch,
-                                    consistency=consistency)
+                                    consistency=consistency,
+                                    sink=into)
         return consul(response)
 
     async def get_tree(self, prefix, *,
@@ -167,6 +193,159 @@ class ReadMixin:
             data["Value"] = decode_value(data["Value"], data["Flags"])
         return consul(result, meta=extract_meta(response.headers))
 
+    def iter_tree(self, prefix, *, separator="/", chunk_size=64,
+                  concurrency=4, dc=None):
+        """Iterates over all keys with a prefix, chunk by chunk
+
+        Parameters:
+            prefix (str): Prefix to fetch
+            separator (str): Separator used to walk the hierarchy
+            chunk_size (int): Maximum number of keys fetched per request
+            concurrency (int): Maximum number of concurrent requests
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+        Returns:
+            KVTreeIterator: an async iterator of values
+        """
+        return KVTreeIterator(self, prefix,
+                              separator=separator,
+                              chunk_size=chunk_size,
+                              concurrency=concurrency,
+                              dc=dc)
+
+
+class KVTreeIterator:
+    """Async iterator over a huge subtree
+
+    Example::
+
+        async for obj in client.kv.iter_tree("config/", chunk_size=64):
+            print(obj["Key"], obj["Value"])
+
+    Instead of fetching the whole subtree in one response, the hierarchy
+    is walked level by level with :meth:`ReadMixin.keys` and ``separator``,
+    and values are fetched by chunks of ``get`` operations in transactions,
+    limited to 64 operations by Consul. Values are yielded as soon as their
+    chunk is fetched.
+
+    Keys deleted during the walk are skipped. Any key created, modified
+    or deleted after the walk started sets ``consistent`` to ``False``.
+
+    Attributes:
+        index (int): **Index** of the first listing
+        consistent (bool): ``False`` if the subtree changed during the walk
+    """
+
+    def __init__(self, endpoint, prefix, *, separator="/", chunk_size=64,
+                 concurrency=4, dc=None):
+        self._endpoint = endpoint
+        self.prefix = prefix
+        self.separator = separator
+        self.chunk_size = max(1, min(chunk_size, 64))
+        self.concurrency = concurrency
+        self.dc = dc
+        self.index = None
+        self.consistent = True
+        self._prefixes = deque([prefix])
+        self._keys = deque()
+        self._pending = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._pending:
+            if self._keys:
+                chunks = []
+                while self._keys and len(chunks) < self.concurrency:
+                    chunks.append([self._keys.popleft()
+                                   for _ in range(min(self.chunk_size,
+                                                      len(self._keys)))])
+                results = await asyncio.gather(*[
+                    self._fetch(chunk) for chunk in chunks
+                ])
+                for values in results:
+                    self._pending.extend(values)
+            elif self._prefixes:
+                prefixes = []
+                while self._prefixes and len(prefixes) < self.concurrency:
+                    prefixes.append(self._prefixes.popleft())
+                await asyncio.gather(*[
+                    self._list(prefix) for prefix in prefixes
+                ])
+            else:
+                raise StopAsyncIteration
+        return self._pending.popleft()
+
+    async def _list(self, prefix):
+        try:
+            keys, meta = await self._endpoint.keys(prefix,
+                                                   dc=self.dc,
+                                                   separator=self.separator)
+        except NotFound:
+            return
+        index = meta.get("Index")
+        if self.index is None:
+            self.index = index
+        elif index is not None and index > self.index:
+            self.consistent = False
+        for key in keys:
+            if key != prefix and key.endswith(self.separator):
+                self._prefixes.append(key)
+            else:
+                self._keys.append(key)
+
+    async def _fetch(self, keys):
+        values = await fetch_keys(self._endpoint._api, keys, dc=self.dc)
+        if len(values) < len(keys):
+            # some keys vanished since they were listed
+            self.consistent = False
+        for obj in values:
+            if self.index is not None and obj["ModifyIndex"] > self.index:
+                self.consistent = False
+        return values
+
+    def __repr__(self):
+        return "<%s(%r, prefix=%r)>" % (self.__class__.__name__,
+                                        str(self._endpoint._api.address),
+                                        self.prefix)
+
+
+async def fetch_keys(api, keys, *, dc=None):
+    """Fetches keys with get operations inside a single transaction
+
+    Parameters:
+        api (API): The api
+        keys (Collection): At most 64 keys
+        dc (str): Specify datacenter that will be used.
+                  Defaults to the agent's local datacenter.
+    Returns:
+        Collection: Values of existing keys, missing keys are skipped
+    Raises:
+        TransactionError: Operations failed for other reasons than
+                          missing keys, like permissions
+    """
+    keys = list(keys)
+    while keys:
+        txn = KVOperations(api)
+        for key in keys:
+            txn.get(key)
+        try:
+            return await txn.execute(dc=dc)
+        except TransactionError as error:
+            if not error.errors or not all(map(is_missing,
+                                               error.errors.values())):
+                raise
+            keys = [key for i, key in enumerate(keys)
+                    if i not in error.errors]
+    return []
+
+
+def is_missing(error):
+    """Tells if a transaction error is about a missing key"""
+    what = error.get("What") or ""
+    return "doesn't exist" in what or "does not exist" in what
+
 
 class WriteMixin:
 
@@ -179,8 +358,13 @@ class WriteMixin:
             flags (int): Flags to set with value
         Returns:
             bool: ``True`` on success
+
+        Besides bytes, value may be any bytes-like object, which is sent
+        without copy, or an async iterable of bytes, which is streamed
+        as is.
         """
-        value = encode_value(value, flags)
+        if not hasattr(value, "__aiter__"):
+            value = encode_value(value, flags)
         response = await self._write(key, value, flags=flags)
         return response.body is True
 
@@ -256,7 +440,7 @@ class WriteMixin:
         Returns:
             bool: ``True`` on success
         """
-        if not isinstance(data, bytes):
+        if not isinstance(data, BYTES_LIKE) and not hasattr(data, "__aiter__"):
             raise ValueError("value must be bytes")
         path = "/v1/kv/%s" % path
         response = await self._api.put(
@@ -328,6 +512,126 @@ class DeleteMixin:
 
 
 class KVEndpoint(EndpointBase, ReadMixin, WriteMixin, DeleteMixin):
+    """
+    Attributes:
+        txn_stats (Counter): ``attempts``, ``conflicts`` and ``commits``
+                             of :meth:`transact`
+    """
+
+    #: seconds of the first backoff of :meth:`transact`, doubled per retry
+    backoff = .01
+
+    #: maximum seconds of backoff of :meth:`transact`
+    max_backoff = 1.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.txn_stats = Counter()
+
+    async def update(self, key, fn, *, flags=None, dc=None, retries=10):
+        """Updates a key with a function, retried on conflicts
+
+        Parameters:
+            key (str): Key to update
+            fn (Callable): Called with the current value, or ``None`` if
+                           the key does not exist. Returns the new value,
+                           or ``None`` to delete the key. May be a coroutine.
+            flags (int): Flags of the key, if created
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            retries (int): Maximum number of retries
+        Returns:
+            Payload: the new value
+        Raises:
+            TransactionError: Conflicts persisted or transaction failed
+
+        For example, a counter::
+
+            await client.kv.update("hits", lambda v: b"%d" % (int(v or 0) + 1))
+        """
+        async def apply(values):
+            value = fn(values[key])
+            if asyncio.iscoroutine(value):
+                value = await value
+            return {key: value}
+        values = await self.transact([key], apply,
+                                     flags=flags, dc=dc, retries=retries)
+        return values.get(key)
+
+    async def transact(self, keys, fn, *, flags=None, dc=None, retries=10):
+        """Read-modify-write of many keys in a single transaction
+
+        Parameters:
+            keys (Collection): At most 64 keys to read
+            fn (Callable): Called with a mapping of keys to their current
+                           value, ``None`` for missing keys. Returns a
+                           mapping of keys to their new value, ``None``
+                           to delete them. May be a coroutine.
+            flags (int): Flags of the created keys
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            retries (int): Maximum number of retries
+        Returns:
+            Mapping: keys to their committed value, without deleted keys
+        Raises:
+            TransactionError: Conflicts persisted or transaction failed
+
+        Keys are read with ``get`` operations, then changes are committed
+        with ``cas`` and ``delete-cas`` operations, and ``check-index``
+        operations guard the keys read but left unchanged. Missing keys
+        are created with a ``cas`` index of 0, but cannot be guarded if
+        left missing. If any key changed meanwhile, the whole transaction
+        is retried with a jittered exponential backoff.
+        """
+        keys = list(keys)
+        if len(keys) > 64:
+            raise ValueError("Transactions are limited to 64 keys")
+        attempt = 0
+        while True:
+            self.txn_stats["attempts"] += 1
+            entries = {obj["Key"]: obj
+                       for obj in await fetch_keys(self._api, keys, dc=dc)}
+            values = {key: entries[key]["Value"] if key in entries else None
+                      for key in keys}
+            changes = fn(dict(values))
+            if asyncio.iscoroutine(changes):
+                changes = await changes
+            txn = self._guarded(entries, values, changes, flags=flags)
+            try:
+                if txn.operations:
+                    await txn.execute(dc=dc)
+            except TransactionError as error:
+                if attempt >= retries or not is_conflict(error):
+                    raise
+                self.txn_stats["conflicts"] += 1
+                self._api.emit("on_retry", self, attempt=attempt + 1,
+                               error=error)
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+                attempt += 1
+                continue
+            self.txn_stats["commits"] += 1
+            return {k: v for k, v in values.items() if v is not None}
+
+    def _guarded(self, entries, values, changes, *, flags=None):
+        """Prepares changes guarded by the indexes of entries read
+
+        values is updated with changes.
+        """
+        txn = self.prepare()
+        for key in sorted(set(values) | set(changes)):
+            entry = entries.get(key)
+            if key in changes and changes[key] != values.get(key):
+                value = values[key] = changes[key]
+                if value is not None:
+                    txn.cas(key, value,
+                            flags=entry["Flags"] if entry else flags,
+                            index=entry["ModifyIndex"] if entry else 0)
+                elif entry:
+                    txn.delete_cas(key, index=entry["ModifyIndex"])
+            elif entry:
+                txn.check_index(key, index=entry["ModifyIndex"])
+        return txn
 
     def prepare(self):
         """Prepare a transaction
@@ -337,6 +641,47 @@ class KVEndpoint(EndpointBase, ReadMixin, WriteMixin, DeleteMixin):
         """
         return KVOperations(self._api)
 
+    def mirror(self, prefix, *, dc=None, wait=None):
+        """Mirrors a subtree locally
+
+        Parameters:
+            prefix (str): Prefix to mirror
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            wait (Duration): Maximum duration of each blocking query
+        Returns:
+            KVMirror: a mirror object
+        """
+        return KVMirror(self, prefix, dc=dc, wait=wait)
+
+    def buffer(self, *, window=.05, max_keys=1024, dc=None, on_error=None):
+        """Buffers writes, coalesced by key
+
+        Parameters:
+            window (float): Seconds writes are kept before being flushed
+            max_keys (int): Maximum number of keys pending
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            on_error (Callable): Called with the key and the error of
+                                 each write rejected by the agent
+        Returns:
+            KVWriteBuffer: a write buffer
+        """
+        return KVWriteBuffer(self, window=window, max_keys=max_keys, dc=dc,
+                             on_error=on_error)
+
+
+def is_conflict(error):
+    """Tells if a transaction failed because of stale indexes
+
+    Parameters:
+        error (TransactionError): The error
+    Returns:
+        bool: ``True`` if the transaction may be retried
+    """
+    return any("index" in str(elt.get("What", "")).lower()
+               for elt in error.errors.values())
+
 
 class KVOperations(EndpointBase):
     """Manages updates or fetches of multiple keys inside a single,
@@ -577,3 +922,467 @@ class KVOperations(EndpointBase):
                 data["Value"] = decode_value(data["Value"], data["Flags"])
             results.append(data)
         return results
+
+
+class KVWriteBuffer:
+    """Write-behind buffer of keys where only the latest value matters
+
+    Example::
+
+        async with client.kv.buffer(window=.1) as buffer:
+            await buffer.set("status/web1", b"busy")
+            await buffer.set("status/web1", b"idle")
+
+    Writes to a key replace the ones still pending, and pending writes
+    are flushed after window seconds in transactions of 64 operations.
+    When max_keys are pending, writes of new keys wait for a flush.
+
+    Writes rejected by the agent, like denied keys, are dropped and
+    given to ``on_error``, or logged without it. The other writes of
+    their transaction stay pending, unless replaced meanwhile, as do
+    writes of transactions that could not be sent. Errors of background
+    flushes are raised by the next :meth:`flush` or :meth:`close`, and
+    pending writes are flushed again after window, doubled per
+    consecutive failure up to ``max_backoff``. Only the first failure of
+    a streak is logged.
+
+    Attributes:
+        stats (Counter): ``writes``, ``coalesced``, ``transactions``,
+                         ``operations`` and ``rejected``
+    """
+
+    #: maximum seconds between background flushes after failures
+    max_backoff = 30.
+
+    def __init__(self, endpoint, *, window=.05, max_keys=1024, dc=None,
+                 on_error=None):
+        self._endpoint = endpoint
+        self.window = window
+        self.max_keys = max_keys
+        self.dc = dc
+        self.on_error = on_error
+        self.stats = Counter()
+        self.closed = False
+        self._pending = {}
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._error = None
+        self._failures = 0
+
+    async def set(self, key, value, *, flags=None):
+        """Sets the Key to the given Value, eventually
+
+        Parameters:
+            key (str): Key to set
+            value (Payload): Value to set, It will be encoded by flags
+            flags (int): Flags to set with value
+        """
+        await self._put(key, ("set", value, flags))
+
+    async def delete(self, key):
+        """Deletes the Key, eventually
+
+        Parameters:
+            key (str): Key to delete
+        """
+        await self._put(key, ("delete", None, None))
+
+    async def _put(self, key, write):
+        if self.closed:
+            raise RuntimeError("%r is closed" % self)
+        self.stats["writes"] += 1
+        if key in self._pending:
+            self.stats["coalesced"] += 1
+        while key not in self._pending and len(self) >= self.max_keys:
+            await self.flush()
+        self._pending[key] = write
+        self._schedule()
+
+    def _schedule(self):
+        if self._task is None and self._pending and not self.closed:
+            self._task = asyncio.ensure_future(self._flush_later())
+
+    async def flush(self):
+        """Writes pending keys now
+
+        Raises:
+            Exception: Error of this flush, or of a background flush
+        """
+        error, self._error = self._error, None
+        async with self._lock:
+            await self._flush()
+        if error is not None:
+            raise error
+
+    async def _flush_later(self):
+        delay = self.window
+        if self._failures:
+            delay = min(self.max_backoff, delay * 2 ** self._failures)
+        await asyncio.sleep(delay)
+        self._task = None
+        try:
+            async with self._lock:
+                await self._flush()
+        except Exception as error:
+            self._failures += 1
+            if self._failures == 1:
+                logger.warning("%r failed to flush: %s", self, error)
+            self._error = error
+            self._schedule()
+
+    async def _flush(self):
+        writes, self._pending = list(self._pending.items()), {}
+        for start in range(0, len(writes), 64):
+            txn = self._endpoint.prepare()
+            chunk = writes[start:start + 64]
+            for key, (verb, value, flags) in chunk:
+                if verb == "delete":
+                    txn.delete(key)
+                else:
+                    txn.set(key, value, flags=flags)
+            try:
+                await txn.execute(dc=self.dc)
+            except TransactionError as error:
+                rejected = {chunk[i][0] for i in error.errors
+                            if i < len(chunk)}
+                self._requeue(writes[start:], rejected)
+                for key in sorted(rejected):
+                    self._reject(key, error)
+                raise
+            except Exception:
+                self._requeue(writes[start:])
+                raise
+            self.stats["transactions"] += 1
+            self.stats["operations"] += len(chunk)
+        if self._failures:
+            logger.info("%r flushed after %d failures", self, self._failures)
+            self._failures = 0
+
+    def _requeue(self, writes, rejected=()):
+        for key, write in writes:
+            if key not in rejected:
+                self._pending.setdefault(key, write)
+
+    def _reject(self, key, error):
+        self.stats["rejected"] += 1
+        if self.on_error is not None:
+            self.on_error(key, error)
+        else:
+            logger.warning("%r dropped write of %r: %s", self, key, error)
+
+    async def close(self):
+        """Flushes pending keys and refuses further writes"""
+        self.closed = True
+        task, self._task = self._task, None
+        try:
+            await self.flush()
+        finally:
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __repr__(self):
+        return "<%s(%r, pending=%s)>" % (self.__class__.__name__,
+                                         str(self._endpoint._api.address),
+                                         len(self))
+
+
+class KVMirror(Watcher):
+    """Local copy of a subtree, kept up to date with blocking queries
+
+    Example::
+
+        mirror = client.kv.mirror("config/")
+        await mirror.refresh()
+        mirror.start()
+        keys = mirror.tree.keys("config/", separator="/")
+
+    Each change of the subtree is applied as a diff to the tree, so only
+    modified keys are touched.
+
+    Attributes:
+        tree (KVTree): the mirrored entries
+    """
+
+    def __init__(self, endpoint, prefix, *, dc=None, wait=None):
+        super().__init__(wait=wait)
+        self._endpoint = endpoint
+        self.prefix = prefix
+        self.dc = dc
+        self.tree = KVTree()
+
+    async def fetch(self, *, watch=None):
+        try:
+            return await self._endpoint.get_tree(self.prefix,
+                                                 dc=self.dc,
+                                                 watch=watch)
+        except NotFound as error:
+            return [], error.meta
+
+    def load(self, value):
+        self.tree.replace(self.prefix, value)
+
+    def dump(self):
+        return self.tree.items(self.prefix)
+
+    def __repr__(self):
+        return "<%s(%r, prefix=%r)>" % (self.__class__.__name__,
+                                        str(self._endpoint._api.address),
+                                        self.prefix)
+
+
+_MISSING = object()
+
+
+class _Node:
+    __slots__ = ("label", "children", "entry", "count")
+
+    def __init__(self, label, entry=_MISSING):
+        self.label = label
+        self.children = {}
+        self.entry = entry
+        self.count = 0
+
+
+class KVTree:
+    """Radix tree of kv entries
+
+    Example::
+
+        values, meta = await client.kv.get_tree("config/")
+        tree = KVTree(values)
+        tree.keys("config/", separator="/")
+        tree.count("config/app/")
+
+    Listing a prefix walks only its subtree, and subtree sizes are
+    maintained on insertion and removal, so :meth:`count` does not walk
+    anything.
+    """
+
+    def __init__(self, entries=None):
+        self.root = _Node("")
+        self.update(entries or [])
+
+    def update(self, entries):
+        """Inserts or replaces entries
+
+        Parameters:
+            entries (Collection): kv entries, such as returned by
+                                  :meth:`KVEndpoint.get_tree` or by
+                                  ``get`` operations of transactions
+        """
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        """Inserts or replaces an entry
+
+        Parameters:
+            entry (Object): kv entry
+        """
+        node, rest, path = self.root, entry["Key"], [self.root]
+        while rest:
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _Node(rest)
+                path.append(child)
+                break
+            common = _common(child.label, rest)
+            if common < len(child.label):
+                middle = node.children[rest[0]] = _Node(rest[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                middle.count = child.count
+                child = middle
+            node, rest = child, rest[common:]
+            path.append(node)
+        node = path[-1]
+        if node.entry is _MISSING:
+            for elt in path:
+                elt.count += 1
+        node.entry = entry
+
+    def discard(self, key):
+        """Removes key if present
+
+        Parameters:
+            key (str): Key to remove
+        Returns:
+            bool: ``True`` if key was present
+        """
+        path = self._path(key)
+        if path is None or path[-1].entry is _MISSING:
+            return False
+        path[-1].entry = _MISSING
+        for node in path:
+            node.count -= 1
+        for parent, node in reversed(list(zip(path, path[1:]))):
+            if node.entry is not _MISSING:
+                break
+            if not node.children:
+                del parent.children[node.label[0]]
+            elif len(node.children) == 1:
+                child, = node.children.values()
+                child.label = node.label + child.label
+                parent.children[node.label[0]] = child
+            else:
+                break
+        return True
+
+    def replace(self, prefix, entries):
+        """Replaces the entries under prefix
+
+        Parameters:
+            prefix (str): Prefix to replace
+            entries (Collection): Every kv entry under prefix
+        Returns:
+            Tuple[List[str], List[str]]: changed keys and removed keys
+
+        Entries with the same **ModifyIndex** are left untouched.
+        """
+        current = {entry["Key"]: entry for entry in self.items(prefix)}
+        changed = []
+        for entry in entries:
+            previous = current.pop(entry["Key"], None)
+            if previous is None or \
+                    previous.get("ModifyIndex") != entry.get("ModifyIndex"):
+                self.add(entry)
+                changed.append(entry["Key"])
+        for key in current:
+            self.discard(key)
+        return changed, list(current)
+
+    def get(self, key, default=None):
+        """Returns the entry of key
+
+        Parameters:
+            key (str): Key to fetch
+            default (Object): Returned if key is missing
+        Returns:
+            Object: the kv entry
+        """
+        path = self._path(key)
+        if path is None or path[-1].entry is _MISSING:
+            return default
+        return path[-1].entry
+
+    def count(self, prefix=""):
+        """Counts keys under prefix
+
+        Parameters:
+            prefix (str): Prefix to count
+        Returns:
+            int: number of keys
+        """
+        node, _ = self._locate(prefix)
+        return node.count if node else 0
+
+    def keys(self, prefix="", *, separator=None):
+        """Returns the keys under prefix, like :meth:`KVEndpoint.keys`
+
+        Parameters:
+            prefix (str): Prefix to list
+            separator (str): List only up to a given separator
+        Returns:
+            List[str]: sorted keys
+        """
+        node, key = self._locate(prefix)
+        if node is None:
+            return []
+        results = []
+        stack = [(node, key)]
+        while stack:
+            node, key = stack.pop()
+            if separator:
+                start = max(len(prefix),
+                            len(key) - len(node.label) - len(separator) + 1)
+                found = key.find(separator, start)
+                if found >= 0:
+                    key = key[:found + len(separator)]
+                    if not results or results[-1] != key:
+                        results.append(key)
+                    continue
+            if node.entry is not _MISSING:
+                results.append(key)
+            stack.extend(self._children(node, key))
+        return results
+
+    def items(self, prefix=""):
+        """Returns the entries under prefix
+
+        Parameters:
+            prefix (str): Prefix to list
+        Returns:
+            Collection: entries sorted by key
+        """
+        node, key = self._locate(prefix)
+        if node is None:
+            return []
+        results = []
+        stack = [(node, key)]
+        while stack:
+            node, key = stack.pop()
+            if node.entry is not _MISSING:
+                results.append(node.entry)
+            stack.extend(self._children(node, key))
+        return results
+
+    def _children(self, node, key):
+        """Children in reversed order, for depth-first walks"""
+        return [(child, key + child.label)
+                for _, child in sorted(node.children.items(), reverse=True)]
+
+    def _path(self, key):
+        node, rest, path = self.root, key, [self.root]
+        while rest:
+            node = node.children.get(rest[0])
+            if node is None or not rest.startswith(node.label):
+                return None
+            rest = rest[len(node.label):]
+            path.append(node)
+        return path
+
+    def _locate(self, prefix):
+        """Finds the top node whose key starts with prefix"""
+        node, rest, key = self.root, prefix, ""
+        while rest:
+            node = node.children.get(rest[0])
+            if node is None:
+                return None, None
+            key += node.label
+            if node.label.startswith(rest):
+                return node, key
+            if not rest.startswith(node.label):
+                return None, None
+            rest = rest[len(node.label):]
+        return node, key
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return self.root.count
+
+    def __repr__(self):
+        return "<%s(%d keys)>" % (self.__class__.__name__, len(self))
+
+
+def _common(a, b):
+    """Returns the length of the common prefix of a and b"""
+    size = min(len(a), len(b))
+    for i in range(size):
+        if a[i] != b[i]:
+            return i
+    return size
@@ -1,5 +1,7 @@
-from .bases import EndpointBase
+import asyncio
+from .bases import EndpointBase, Watcher
 from aioconsul.util import extract_attr
+from collections import defaultdict
 
 
 class MembersEndpoint(EndpointBase):
@@ -58,6 +60,20 @@ class MembersEndpoint(EndpointBase):
                                        params={"wan": wan})
         return response.status == 200
 
+    def tracker(self, *, wan=None, interval=1., max_interval=30.):
+        """Tracks members and their changes
+
+        Parameters:
+            wan (bool): Track WAN members instead of the LAN members
+            interval (float): Seconds between polls after a change
+            max_interval (float): Maximum seconds between polls
+        Returns:
+            MembershipTracker: a tracker object
+        """
+        return MembershipTracker(self, wan=wan,
+                                 interval=interval,
+                                 max_interval=max_interval)
+
     async def force_leave(self, node):
         """Forces removal of a node
 
@@ -76,3 +92,152 @@ class MembersEndpoint(EndpointBase):
         node_id = extract_attr(node, keys=["Node", "ID"])
         response = await self._get("/v1/agent/force-leave", node_id)
         return response.status == 200
+
+
+#: serf member statuses
+ALIVE, LEAVING, LEFT, FAILED = 1, 2, 3, 4
+
+
+class MembershipTracker(Watcher):
+    """Indexed list of members, diffed on each poll
+
+    Example::
+
+        tracker = client.members.tracker()
+
+        def on_change(event, member):
+            print(event, member["Name"])
+        tracker.add_listener(on_change)
+        await tracker.refresh()
+        tracker.start()
+
+    Gossip members cannot be watched with blocking queries, so they are
+    polled, every ``interval`` seconds after a change, then less and less
+    often up to ``max_interval`` seconds while they are stable.
+
+    Each member record is hashed, so that polls only compare hashes.
+    Listeners are called with one of the ``join``, ``leave``, ``fail``
+    and ``update`` events, and the member. They may be coroutines.
+
+    Attributes:
+        members (Mapping): Members by name
+        events (Collection): Events of the last change
+    """
+
+    def __init__(self, endpoint, *, wan=None, interval=1., max_interval=30.,
+                 loop=None):
+        super().__init__(loop=loop)
+        self._endpoint = endpoint
+        self.wan = wan
+        self.interval = interval
+        self.max_interval = max_interval
+        self.delay = interval
+        self.members = {}
+        self.events = []
+        self._hashes = {}
+        self._listeners = []
+        self._indexes = defaultdict(lambda: defaultdict(set))
+
+    def add_listener(self, listener):
+        """Calls listener with each event"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    async def fetch(self, *, watch=None):
+        members = await self._endpoint.items(wan=self.wan)
+        digest = hash(frozenset(member_hash(member) for member in members))
+        return members, {"Index": digest}
+
+    def load(self, value):
+        members = {member["Name"]: member for member in value}
+        hashes = {name: member_hash(m) for name, m in members.items()}
+        events = []
+        for name, member in members.items():
+            previous = self.members.get(name)
+            if hashes[name] == self._hashes.get(name):
+                continue
+            event = member_event(previous, member)
+            if event:
+                events.append((event, member))
+        for name, member in self.members.items():
+            if name not in members and member["Status"] not in (LEFT, FAILED):
+                events.append(("leave", member))
+        self.members, self._hashes = members, hashes
+        self._index()
+        self.events = events
+        for event, member in events:
+            for listener in list(self._listeners):
+                result = listener(event, member)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result, loop=self.loop)
+
+    def _index(self):
+        self._indexes = indexes = defaultdict(lambda: defaultdict(set))
+        for name, member in self.members.items():
+            indexes["status"][member["Status"]].add(name)
+            for item in (member.get("Tags") or {}).items():
+                indexes["tag"][item].add(name)
+
+    def dump(self):
+        return list(self.members.values())
+
+    def query(self, *, status=None, tags=None):
+        """Queries members
+
+        Parameters:
+            status (int): Serf status, like 1 for alive
+            tags (Mapping): Tags that members must have
+        Returns:
+            Collection: matching members, sorted by name
+        """
+        criteria = [("tag", item) for item in (tags or {}).items()]
+        if status is not None:
+            criteria.append(("status", status))
+        if not criteria:
+            names = set(self.members)
+        else:
+            sets = sorted((self._indexes[k].get(v, set())
+                           for k, v in criteria), key=len)
+            names = set(sets[0]).intersection(*sets[1:])
+        return [self.members[name] for name in sorted(names)]
+
+    async def refresh(self):
+        changed = await super().refresh()
+        if changed:
+            self.delay = self.interval
+        else:
+            self.delay = min(self.delay * 2, self.max_interval)
+        return changed
+
+    async def pause(self, changed):
+        await asyncio.sleep(self.delay)
+
+    def __repr__(self):
+        return "<%s(%r, wan=%r)>" % (self.__class__.__name__,
+                                     str(self._endpoint._api.address),
+                                     self.wan)
+
+
+def member_hash(member):
+    tags = member.get("Tags") or {}
+    return hash((member["Name"], member.get("Addr"), member.get("Port"),
+                 member["Status"], tuple(sorted(tags.items())),
+                 member.get("ProtocolCur"), member.get("DelegateCur")))
+
+
+def member_event(previous, member):
+    """Names the change from previous to member"""
+    status = member["Status"]
+    if previous is None:
+        return "join" if status == ALIVE else None
+    if status == previous["Status"]:
+        return "update"
+    if status == ALIVE and previous["Status"] in (LEFT, FAILED):
+        return "join"
+    if status == LEFT:
+        return "leave"
+    if status == FAILED:
+        return "fail"
+    return "update"
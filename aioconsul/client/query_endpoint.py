@@ -1,5 +1,9 @@
+import asyncio
 from .bases import EndpointBase
+from aioconsul.common import duration_to_timedelta
 from aioconsul.util import extract_attr
+from collections import Counter
+from datetime import timedelta
 
 
 class QueryEndpoint(EndpointBase):
@@ -343,3 +347,127 @@ class QueryEndpoint(EndpointBase):
             "dc": dc})
         result = response.body
         return result
+
+    def cache(self, *, refresh=.8, loop=None):
+        """Creates a cached executor of prepared queries
+
+        Parameters:
+            refresh (float): Fraction of the TTL after which results are
+                             refreshed in background
+        Returns:
+            QueryCache: a cached executor
+        """
+        return QueryCache(self, refresh=refresh, loop=loop)
+
+
+class QueryCache:
+    """Executes prepared queries, keeping results for their DNS TTL
+
+    Example::
+
+        cache = client.query.cache()
+        result = await cache.execute("my-query", near="_agent")
+
+    Results are kept per query, dc, near and limit for the **DNS** **TTL**
+    of the prepared query. Results whose TTL is zero are not kept.
+
+    Once ``refresh`` of the TTL is elapsed, the cached result is still
+    returned but refreshed in background. Concurrent executions of the
+    same query share the same request. Requests in flight when results
+    are invalidated are not kept.
+
+    .. note:: results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, endpoint, *, refresh=.8, loop=None):
+        self._endpoint = endpoint
+        self.refresh = refresh
+        self.loop = loop
+        self._entries = {}
+        self._pending = {}
+        self._generations = Counter()
+
+    async def execute(self, query, *, dc=None, near=None, limit=None):
+        """Executes a prepared query
+
+        Parameters:
+            query (ObjectID): Query ID
+            dc (str): Specify datacenter that will be used.
+                      Defaults to the agent's local datacenter.
+            near (str): Sort the resulting list in ascending order based on
+                        the estimated round trip time from that node
+            limit (int): Limit the list's size to the given number of nodes
+        Returns:
+            Object: the cached or fresh result
+        Raises:
+            NotFound: the query does not exist
+
+        See :meth:`QueryEndpoint.execute` for the returned body.
+        """
+        key = (extract_attr(query, keys=["ID"]), dc, near, limit)
+        entry = self._entries.get(key)
+        if entry:
+            result, refresh_at, expires_at = entry
+            now = self._loop.time()
+            if now < expires_at:
+                if now >= refresh_at:
+                    self._fetch(key)
+                return result
+            del self._entries[key]
+        return await asyncio.shield(self._fetch(key))
+
+    def invalidate(self, query=None):
+        """Drops cached results
+
+        Parameters:
+            query (ObjectID): Drops only results of this query
+        """
+        if query is not None:
+            query = extract_attr(query, keys=["ID"])
+        for key in set(self._entries).union(self._pending):
+            if query is None or key[0] == query:
+                self._entries.pop(key, None)
+                # requests in flight are left to their callers
+                self._pending.pop(key, None)
+                self._generations[key] += 1
+
+    @property
+    def _loop(self):
+        return self.loop or asyncio.get_event_loop()
+
+    def _fetch(self, key):
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._execute(key, self._generations[key]), loop=self.loop)
+            self._pending[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    def _done(self, key, future):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+        if not future.cancelled():
+            # a failed background refresh keeps the previous result
+            future.exception()
+
+    async def _execute(self, key, generation):
+        query_id, dc, near, limit = key
+        result = await self._endpoint.execute(query_id,
+                                              dc=dc,
+                                              near=near,
+                                              limit=limit)
+        ttl = (result.get("DNS") or {}).get("TTL") or 0
+        if isinstance(ttl, str):
+            ttl = duration_to_timedelta(ttl)
+        if isinstance(ttl, timedelta):
+            ttl = ttl.total_seconds()
+        if ttl > 0 and generation == self._generations[key]:
+            now = self._loop.time()
+            self._entries[key] = (result, now + ttl * self.refresh,
+                                  now + ttl)
+        return result
+
+    def __repr__(self):
+        return "<%s(%r)>" % (self.__class__.__name__,
+                             str(self._endpoint._api.address))
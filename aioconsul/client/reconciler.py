@@ -0,0 +1,187 @@
+import asyncio
+from .util import content_hash
+
+__all__ = ["ServiceReconciler", "ReconcileResult"]
+
+
+class ReconcileResult:
+    """Summary of a reconciliation
+
+    Objects are identified by tuples like ``("service", "redis1")`` or
+    ``("check", "mem")``.
+
+    Attributes:
+        created (List[Tuple[str, str]]): Registered objects
+        updated (List[Tuple[str, str]]): Registered again because changed
+        deleted (List[Tuple[str, str]]): Deregistered objects
+        unchanged (List[Tuple[str, str]]): Objects left untouched
+        errors (Mapping): Exceptions raised, by object
+    """
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.unchanged = []
+        self.errors = {}
+
+    @property
+    def changed(self):
+        """bool: ``True`` if anything was registered or deregistered"""
+        return bool(self.created or self.updated or self.deleted)
+
+    @property
+    def failed(self):
+        """bool: ``True`` if at least one change failed"""
+        return bool(self.errors)
+
+    def __repr__(self):
+        return "<%s(created=%s, updated=%s, deleted=%s, unchanged=%s, " \
+               "errors=%s)>" % (self.__class__.__name__,
+                                len(self.created),
+                                len(self.updated),
+                                len(self.deleted),
+                                len(self.unchanged),
+                                len(self.errors))
+
+
+def service_id(definition):
+    return definition.get("ID") or definition["Name"]
+
+
+def check_id(definition):
+    return definition.get("ID") or definition.get("CheckID") \
+        or definition["Name"]
+
+
+def service_fields(definition):
+    """Fields of a service definition, as reported by the agent"""
+    return {
+        "ID": service_id(definition),
+        "Service": definition.get("Name") or definition.get("Service"),
+        "Tags": sorted(definition.get("Tags") or []),
+        "Address": definition.get("Address") or "",
+        "Port": definition.get("Port") or 0,
+        "EnableTagOverride": bool(definition.get("EnableTagOverride"))
+    }
+
+
+def check_fields(definition):
+    """Fields of a check definition, as reported by the agent"""
+    return {
+        "CheckID": check_id(definition),
+        "Name": definition.get("Name") or "",
+        "Notes": definition.get("Notes") or "",
+        "ServiceID": definition.get("ServiceID") or ""
+    }
+
+
+class ServiceReconciler:
+    """Converges the services and checks of the local agent
+    to a desired set
+
+    Example::
+
+        reconciler = client.reconciler(prune=True)
+        result = await reconciler.reconcile(services, checks)
+
+    Desired definitions are the ones given to
+    :meth:`ServicesEndpoint.register` and :meth:`ChecksEndpoint.register`.
+    They are compared by content hash with what the agent reports, and
+    with what this reconciler applied last, since the agent does not
+    report every field, like check intervals. Only the differences are
+    applied, so unchanged services never bump the catalog index.
+
+    The ``consul`` service, the ``serfHealth`` check, checks defined
+    by services and maintenance checks are never pruned.
+
+    Parameters:
+        client (Consul): the client
+        concurrency (int): Maximum number of concurrent registrations
+        prune (bool): Deregister services and checks that are not desired
+    """
+
+    def __init__(self, client, *, concurrency=8, prune=False):
+        self._client = client
+        self.concurrency = concurrency
+        self.prune = prune
+        self._applied = {}
+
+    async def reconcile(self, services, checks=()):
+        """Applies the minimal changes
+
+        Parameters:
+            services (Collection): Desired service definitions
+            checks (Collection): Desired check definitions
+        Returns:
+            ReconcileResult: what has been done
+        """
+        current_services, current_checks = await asyncio.gather(
+            self._client.services.items(),
+            self._client.checks.items())
+        result = ReconcileResult()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(key, func, arg, bucket):
+            async with semaphore:
+                try:
+                    await func(arg)
+                except Exception as error:
+                    self._applied.pop(key, None)
+                    result.errors[key] = error
+                    return
+            if bucket is result.deleted:
+                self._applied.pop(key, None)
+            else:
+                self._applied[key] = content_hash(arg)
+            bucket.append(key)
+
+        desired_checks = {check_id(obj): obj for obj in checks}
+        desired_services = {service_id(obj): obj for obj in services}
+        if self.prune:
+            await asyncio.gather(*[
+                run(("check", id), self._client.checks.deregister, id,
+                    result.deleted)
+                for id in current_checks
+                if id not in desired_checks and prunable_check(id)
+            ])
+            await asyncio.gather(*[
+                run(("service", id), self._client.services.deregister, id,
+                    result.deleted)
+                for id in current_services
+                if id not in desired_services and id != "consul"
+            ])
+
+        await asyncio.gather(*[
+            run(key, self._client.services.register, obj, bucket)
+            for key, obj, bucket in self._diff(
+                "service", desired_services, current_services,
+                service_fields, result)
+        ])
+        await asyncio.gather(*[
+            run(key, self._client.checks.register, obj, bucket)
+            for key, obj, bucket in self._diff(
+                "check", desired_checks, current_checks,
+                check_fields, result)
+        ])
+        return result
+
+    def _diff(self, kind, desired, current, fields, result):
+        for id, obj in desired.items():
+            key, digest = (kind, id), content_hash(obj)
+            if id not in current:
+                yield key, obj, result.created
+            elif self._applied.get(key, digest) != digest or \
+                    fields(obj) != fields(current[id]):
+                yield key, obj, result.updated
+            else:
+                self._applied[key] = digest
+                result.unchanged.append(key)
+
+    def __repr__(self):
+        return "<%s(%r)>" % (self.__class__.__name__,
+                             str(self._client.address))
+
+
+def prunable_check(id):
+    return id != "serfHealth" and not id.startswith(("service:", "_"))
@@ -1,4 +1,10 @@
-from .bases import EndpointBase
+import asyncio
+import time
+import weakref
+from .bases import EndpointBase, Watcher
+from .operator_endpoint import OperatorEndpoint
+from aioconsul.exceptions import ConsulError, UnauthorizedError
+from aioconsul.hooks import Hooks
 
 
 class StatusEndpoint(EndpointBase):
@@ -39,3 +45,181 @@ class StatusEndpoint(EndpointBase):
         response = await self._api.get("/v1/status/peers")
         if response.status == 200:
             return set(response.body)
+
+    def monitor(self, *, interval=30.):
+        """Monitors leader, peers and Raft configuration
+
+        Parameters:
+            interval (float): Seconds between polls, the shared monitor
+                              polls at the shortest interval requested
+        Returns:
+            ClusterStatusMonitor: the monitor shared by every client
+                                  of the same agent in this process
+        """
+        key = str(self._api.address)
+        monitor = _monitors.get(key)
+        if monitor is None:
+            monitor = _monitors[key] = ClusterStatusMonitor(
+                self, interval=interval)
+        else:
+            monitor.interval = min(monitor.interval, interval)
+        monitor.observe(self._api)
+        return monitor
+
+
+#: monitors by agent address
+_monitors = weakref.WeakValueDictionary()
+
+
+class ClusterStatusMonitor(Watcher, Hooks):
+    """Keeps leader, peers and Raft configuration up to date
+
+    Example::
+
+        monitor = client.status.monitor()
+        monitor.add_listener(lambda old, new: print("leader", old, new))
+        await monitor.refresh()
+        monitor.start()
+
+    The ``X-Consul-KnownLeader`` and ``X-Consul-LastContact`` headers of
+    the responses of every observed client are recorded. Status is polled
+    every ``interval`` seconds, unless a response received meanwhile
+    showed a known leader with a fresh last contact: the poll is then
+    skipped, for at most ``max_interval`` seconds in a row (ten intervals
+    by default). A lost leader triggers a poll right away.
+
+    Observing a client registers the monitor as one of its hooks, so
+    every request of the client goes through the hooks middleware.
+
+    The Raft configuration is fetched on first load, then again only
+    when leader or peers change. It requires ``operator`` read permission:
+    after a permission error it is no longer requested, and stays ``None``.
+
+    Attributes:
+        leader (str): Address of leader, ``None`` without leader
+        peers (Set[str]): Addresses of peers
+        configuration (Object): Raft configuration
+        known_leader (bool): Last observed **KnownLeader**
+        last_contact (int): Last observed **LastContact**, in milliseconds
+        observed (float): Time of last observation, as in ``time.monotonic``
+        max_contact (int): **LastContact** over which leadership looks
+                           lost, in milliseconds
+    """
+
+    max_contact = 2000
+
+    def __init__(self, endpoint, *, interval=30., max_interval=None,
+                 loop=None):
+        super().__init__(loop=loop)
+        self._endpoint = endpoint
+        self.interval = interval
+        self.max_interval = max_interval
+        self.leader = None
+        self.peers = set()
+        self.configuration = None
+        self.known_leader = None
+        self.last_contact = None
+        self.observed = None
+        self._listeners = []
+        self._wake = None
+        self._denied = False
+
+    def observe(self, api):
+        """Observes the responses of api"""
+        if self not in api.hooks:
+            api.add_hook(self)
+
+    def add_listener(self, listener):
+        """Calls listener with previous and new leader on leader change"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    async def fetch(self, *, watch=None):
+        leader, peers = await asyncio.gather(self._endpoint.leader(),
+                                             self._endpoint.peers())
+        value = {
+            "Leader": leader or None,
+            "Peers": sorted(peers or ()),
+            "Configuration": self.configuration
+        }
+        observed = (self.leader, sorted(self.peers))
+        if (value["Leader"], value["Peers"]) != observed or self.index is None:
+            value["Configuration"] = await self._fetch_configuration()
+        configuration = value["Configuration"]
+        index = hash((value["Leader"], tuple(value["Peers"]),
+                      (configuration or {}).get("Index")))
+        return value, {"Index": index}
+
+    async def _fetch_configuration(self):
+        if self._denied:
+            return None
+        try:
+            return await OperatorEndpoint(self._endpoint._api).configuration()
+        except UnauthorizedError:
+            self._denied = True
+        except ConsulError:
+            pass
+        return None
+
+    def load(self, value):
+        previous, self.leader = self.leader, value["Leader"]
+        self.peers = set(value["Peers"])
+        self.configuration = value["Configuration"]
+        if previous != self.leader:
+            for listener in list(self._listeners):
+                result = listener(previous, self.leader)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result, loop=self.loop)
+
+    def dump(self):
+        return {
+            "Leader": self.leader,
+            "Peers": sorted(self.peers),
+            "Configuration": self.configuration
+        }
+
+    def on_request_end(self, request, response, *, elapsed, error=None):
+        if response is None:
+            return
+        known_leader = response.headers.get("X-Consul-KnownLeader")
+        if known_leader is None:
+            return
+        leading = self._leading()
+        self.known_leader = known_leader == "true"
+        self.last_contact = int(response.headers.get(
+            "X-Consul-LastContact") or 0)
+        self.observed = time.monotonic()
+        if leading and not self._leading() and self._wake is not None:
+            self._wake.set()
+
+    def _leading(self, since=None):
+        """Tells if observed responses show a known leader, recently
+        """
+        if not self.known_leader or self.observed is None:
+            return False
+        if since is not None and self.observed < since:
+            return False
+        return (self.last_contact or 0) <= self.max_contact
+
+    async def pause(self, changed):
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        started = time.monotonic()
+        max_interval = self.max_interval or 10 * self.interval
+        while True:
+            since = time.monotonic()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            if not self._leading(since) or now - started >= max_interval:
+                break
+        self._wake.clear()
+
+    def __repr__(self):
+        return "<%s(%r)>" % (self.__class__.__name__,
+                             str(self._endpoint._api.address))
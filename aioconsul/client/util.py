@@ -1,3 +1,17 @@
+import hashlib
+from aioconsul.encoders import json
+
+
+def content_hash(obj):
+    """Digest of obj, independent of the order of its keys
+
+    Parameters:
+        obj (Object): any JSON serializable object
+    Returns:
+        str: the digest
+    """
+    data = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
 
 
 def prepare_node(data):
@@ -30,20 +44,10 @@ def prepare_node(data):
         return data, {}
 
     # from /v1/health/service/<service>
-    if all(field in data for field in ("Node", "Service", "Checks")):
+    if "Checks" in data and "Service" in data and "Node" in data:
         return data["Node"]["Node"], data["Node"]
 
-    result = {}
-    if "ID" in data:
-        result["Node"] = data["ID"]
-    for k in ("Datacenter", "Node", "Address",
-              "TaggedAddresses", "Service",
-              "Check", "Checks"):
-        if k in data:
-            result[k] = data[k]
-    if list(result) == ["Node"]:
-        return result["Node"], {}
-    return result.get("Node"), result
+    return _node_definition(data)
 
 
 def prepare_service(data):
@@ -96,33 +100,17 @@ def prepare_service(data):
         return data, {}
 
     # from /v1/health/service/<service>
-    if all(field in data for field in ("Node", "Service", "Checks")):
+    if "Checks" in data and "Service" in data and "Node" in data:
         return data["Service"]["ID"], data["Service"]
 
     # from /v1/health/checks/<service>
     # from /v1/health/node/<node>
     # from /v1/health/state/<state>
     # from /v1/catalog/service/<service>
-    if all(field in data for field in ("ServiceName", "ServiceID")):
-        return data["ServiceID"], {
-            "ID": data["ServiceID"],
-            "Service": data["ServiceName"],
-            "Tags": data.get("ServiceTags"),
-            "Address": data.get("ServiceAddress"),
-            "Port": data.get("ServicePort"),
-        }
-
-    if list(data) == ["ID"]:
-        return data["ID"], {}
+    if "ServiceID" in data and "ServiceName" in data:
+        return _service_entry(data)
 
-    result = {}
-    if "Name" in data:
-        result["Service"] = data["Name"]
-
-    for k in ("Service", "ID", "Tags", "Address", "Port"):
-        if k in data:
-            result[k] = data[k]
-    return result.get("ID"), result
+    return _service_definition(data)
 
 
 def prepare_check(data):
@@ -139,12 +127,48 @@ def prepare_check(data):
     if isinstance(data, str):
         return data, {}
 
-    result = {}
-    if "ID" in data:
+    return _check_definition(data)
+
+
+def _node_definition(data):
+    result = {k: data[k] for k in NODE_FIELDS if k in data}
+    if "ID" in data and "Node" not in data:
+        result["Node"] = data["ID"]
+    if len(result) == 1 and "Node" in result:
+        return result["Node"], {}
+    return result.get("Node"), result
+
+
+def _service_entry(data):
+    return data["ServiceID"], {
+        "ID": data["ServiceID"],
+        "Service": data["ServiceName"],
+        "Tags": data.get("ServiceTags"),
+        "Address": data.get("ServiceAddress"),
+        "Port": data.get("ServicePort"),
+    }
+
+
+def _service_definition(data):
+    if len(data) == 1 and "ID" in data:
+        return data["ID"], {}
+
+    result = {k: data[k] for k in SERVICE_FIELDS if k in data}
+    if "Name" in data and "Service" not in data:
+        result["Service"] = data["Name"]
+    return result.get("ID"), result
+
+
+def _check_definition(data):
+    result = {k: data[k] for k in CHECK_FIELDS if k in data}
+    if "ID" in data and "CheckID" not in data:
         result["CheckID"] = data["ID"]
-    for k in ("Node", "CheckID", "Name", "Notes", "Status", "ServiceID"):
-        if k in data:
-            result[k] = data[k]
-    if list(result) == ["CheckID"]:
+    if len(result) == 1 and "CheckID" in result:
         return result["CheckID"], {}
     return result.get("CheckID"), result
+
+
+NODE_FIELDS = ("Datacenter", "Node", "Address", "TaggedAddresses",
+               "NodeMeta", "Service", "Check", "Checks")
+SERVICE_FIELDS = ("Service", "ID", "Tags", "Address", "Port")
+CHECK_FIELDS = ("Node", "CheckID", "Name", "Notes", "Status", "ServiceID")
@@ -1,4 +1,7 @@
 from .addr import *  # noqa
+from .deadline import *  # noqa
+from .limit import *  # noqa
 from .objs import *  # noqa
+from .persist import *  # noqa
 from .req import *  # noqa
 from .util import *  # noqa
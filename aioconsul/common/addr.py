@@ -6,6 +6,8 @@ class Address(namedtuple("Address", "proto, host, port")):
     """
 
     def __str__(self):
+        if self.proto == "unix":
+            return 'unix://%s' % self.host
         return '%s://%s:%s' % (self.proto, self.host, self.port)
 
 
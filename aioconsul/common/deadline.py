@@ -0,0 +1,83 @@
+import asyncio
+import time
+import weakref
+from contextlib import contextmanager
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+__all__ = ["deadline", "get_deadline"]
+
+if contextvars is not None:
+    _deadline = contextvars.ContextVar("aioconsul_deadline", default=None)
+else:  # pragma: no cover
+    # without contextvars, deadlines are scoped to the current task
+    _deadline = None
+    _deadlines = weakref.WeakKeyDictionary()
+
+
+def get_deadline():
+    """Returns the deadline of the current context
+
+    Returns:
+        float: as in ``time.monotonic``, ``None`` without deadline
+    """
+    if _deadline is not None:
+        return _deadline.get()
+    task = _current_task()
+    return _deadlines.get(task) if task else None
+
+
+def _set_deadline(value):
+    if _deadline is not None:
+        token = _deadline.set(value)
+        return lambda: _deadline.reset(token)
+    task = _current_task()
+    if task is None:
+        raise RuntimeError("deadline() must be used inside a task")
+    previous = _deadlines.get(task)
+    _deadlines[task] = value
+
+    def reset():
+        if previous is None:
+            _deadlines.pop(task, None)
+        else:
+            _deadlines[task] = previous
+    return reset
+
+
+def _current_task():
+    try:
+        return asyncio.Task.current_task()
+    except RuntimeError:
+        return None
+
+
+@contextmanager
+def deadline(timeout):
+    """Bounds the duration of every request made inside the block
+
+    Parameters:
+        timeout (float): Seconds from now
+
+    For example::
+
+        with deadline(2.):
+            value, meta = await client.kv.get("foo")
+            nodes, meta = await client.catalog.nodes(watch=meta)
+
+    Requests not done in time raise :class:`asyncio.TimeoutError`, and
+    blocking queries wait no longer than the remaining time. Nested
+    deadlines can only shorten the enclosing one.
+    """
+    value = time.monotonic() + timeout
+    current = get_deadline()
+    if current is not None:
+        value = min(value, current)
+    reset = _set_deadline(value)
+    try:
+        yield value
+    finally:
+        reset()
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from aioconsul.exceptions import LimitExceeded
+
+__all__ = ["TokenBucket", "Governor"]
+
+
+class TokenBucket:
+    """Limits the rate of operations
+
+    Parameters:
+        rate (float): Tokens added per second
+        burst (int): Maximum number of tokens, defaults to rate
+    """
+
+    def __init__(self, rate, *, burst=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Takes tokens if available
+
+        Returns:
+            bool: ``True`` if tokens were taken
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens=1):
+        """Seconds to wait until tokens are available"""
+        self._refill()
+        return max(0., (tokens - self.tokens) / self.rate)
+
+    async def acquire(self, tokens=1):
+        """Waits until tokens are available, then takes them"""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.delay(tokens))
+
+    def __repr__(self):
+        return "<%s(rate=%r, burst=%r)>" % (self.__class__.__name__,
+                                            self.rate, self.burst)
+
+
+class Governor:
+    """Limits the rate and the concurrency of operations
+
+    Operations over the limits are queued, in order, for at most
+    ``max_wait`` seconds. With a ``max_wait`` of 0, they fail fast.
+
+    Parameters:
+        rate (float): Operations per second, unlimited by default
+        burst (int): Operations allowed at once above rate
+        concurrency (int): Maximum number of operations in flight,
+                           unlimited by default
+        max_wait (float): Maximum seconds queued, forever by default
+
+    Attributes:
+        in_flight (int): Operations running
+        waiting (int): Operations queued
+    """
+
+    def __init__(self, *, rate=None, burst=None, concurrency=None,
+                 max_wait=None):
+        self.bucket = TokenBucket(rate, burst=burst) if rate else None
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(concurrency) \
+            if concurrency else None
+
+    def _ready(self):
+        return not self.waiting \
+            and not (self._semaphore and self._semaphore.locked()) \
+            and not (self.bucket and self.bucket.delay())
+
+    async def acquire(self, *, timeout=None):
+        """Waits until the operation is allowed
+
+        Every acquire must be followed by a :meth:`release`.
+
+        Parameters:
+            timeout (float): Maximum seconds queued, defaults to max_wait
+        Returns:
+            float: Seconds queued
+        Raises:
+            LimitExceeded: Operation has not been allowed in time
+        """
+        if timeout is None:
+            timeout = self.max_wait
+        if self._ready():
+            await self._acquire()
+            return 0.
+        if timeout is not None and timeout <= 0:
+            raise LimitExceeded("Limit exceeded, %s in flight, %s queued" % (
+                self.in_flight, self.waiting))
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise LimitExceeded("Waited %.3fs in queue" % timeout) from None
+        finally:
+            self.waiting -= 1
+        return time.monotonic() - start
+
+    async def _acquire(self):
+        if self._semaphore:
+            await self._semaphore.acquire()
+        try:
+            if self.bucket:
+                await self.bucket.acquire()
+        except BaseException:
+            if self._semaphore:
+                self._semaphore.release()
+            raise
+        self.in_flight += 1
+
+    def release(self):
+        """Marks an operation as done"""
+        self.in_flight -= 1
+        if self._semaphore:
+            self._semaphore.release()
+
+    def __repr__(self):
+        return "<%s(bucket=%r, concurrency=%r, max_wait=%r)>" % (
+            self.__class__.__name__,
+            self.bucket, self.concurrency, self.max_wait)
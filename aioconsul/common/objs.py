@@ -6,12 +6,16 @@ Response = namedtuple("Response", "url status body headers method")
 
 class Response:
 
-    def __init__(self, path, status, body, headers, method):
+    def __init__(self, path, status, body, headers, method, *,
+                 size=None, decode_time=None, elapsed=None):
         self.path = path
         self.status = status
         self.body = body
         self.headers = headers
         self.method = method
+        self.size = size
+        self.decode_time = decode_time
+        self.elapsed = elapsed
 
     def __repr__(self):
         return "<%s(method=%r, path=%r, status=%r, body=%r, headers=%r)>" % (
@@ -0,0 +1,62 @@
+import json
+import os
+from base64 import b64decode, b64encode
+from tempfile import NamedTemporaryFile
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+__all__ = ["read_state", "write_state"]
+
+
+def write_state(path, state):
+    """Writes state to path atomically
+
+    Parameters:
+        path (str): File path
+        state (Object): State made of JSON types and bytes
+
+    It is encoded with msgpack when installed, otherwise with JSON.
+    """
+    if msgpack is not None:
+        data = msgpack.packb(state, use_bin_type=True)
+    else:
+        data = json.dumps(state, default=_encode_bytes,
+                          separators=(",", ":")).encode("utf-8")
+    directory = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile("wb", dir=directory, delete=False) as file:
+        file.write(data)
+    os.replace(file.name, path)
+
+
+def read_state(path):
+    """Reads state from path
+
+    Parameters:
+        path (str): File path
+    Returns:
+        Object: the state
+    Raises:
+        FileNotFoundError: path does not exist
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:1] == b"{":
+        return json.loads(data.decode("utf-8"), object_hook=_decode_bytes)
+    if msgpack is None:
+        raise ValueError("msgpack is required to read %s" % path)
+    return msgpack.unpackb(data, raw=False)
+
+
+def _encode_bytes(obj):
+    if isinstance(obj, bytes):
+        return {"__bytes__": b64encode(obj).decode("utf-8")}
+    raise TypeError("%r is not JSON serializable" % obj)
+
+
+def _decode_bytes(obj):
+    if list(obj) == ["__bytes__"]:
+        return b64decode(obj["__bytes__"])
+    return obj
@@ -1,35 +1,137 @@
 import aiohttp
 import asyncio
 import json
+import time
 from .addr import parse_addr
 from .objs import Response
 
 
 class RequestHandler:
+    """Sends requests to the agent
+
+    The HTTP session is only opened by the first request, in the loop
+    running it, and is closed by :meth:`close`. Addresses like
+    ``unix:///path/to/socket`` connect through Unix sockets.
+
+    Attributes:
+        in_flight (int): Requests not done yet
+    """
 
     def __init__(self, address, *, loop=None):
         self.address = parse_addr(address, proto="http", host="localhost")
-        self.loop = loop or asyncio.get_event_loop()
-        self.session = aiohttp.ClientSession(loop=self.loop)
+        self.loop = loop
         self.json_loader = json.loads
+        self.in_flight = 0
+        self._session = None
+        self._idle = None
+
+    @property
+    def session(self):
+        """aiohttp.ClientSession: the session, opened if needed"""
+        if self._session is None or self._session.closed:
+            connector = None
+            if self.address.proto == "unix":
+                connector = aiohttp.UnixConnector(path=self.address.host)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  loop=self.loop)
+        return self._session
+
+    @property
+    def url(self):
+        """str: base URL of requests"""
+        if self.address.proto == "unix":
+            return "http://localhost"
+        return self.address.__str__()
+
+    async def request(self, method, path, *, sink=None, timeout=None,
+                      **kwargs):
+        if timeout is not None:
+            return await asyncio.wait_for(
+                self.request(method, path, sink=sink, **kwargs), timeout)
+        self.in_flight += 1
+        try:
+            return await self._request(method, path, sink=sink, **kwargs)
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight and self._idle is not None:
+                self._idle.set()
 
-    async def request(self, method, path, **kwargs):
-        url = "%s/%s" % (self.address.__str__(), path.lstrip("/"))
+    async def _request(self, method, path, *, sink=None, **kwargs):
+        url = "%s/%s" % (self.url, path.lstrip("/"))
+        start = time.perf_counter()
         async with self.session.request(method, url, **kwargs) as response:
-            if response.headers.get("Content-Type") == "application/json":
-                body = await response.json(encoding="utf-8",
-                                           loads=self.json_loader)
+            decode_time = None
+            if sink is not None and response.status < 400:
+                body = size = await stream_into(response.content, sink)
+            elif response.headers.get("Content-Type") == "application/json":
+                body = await response.read()
+                size, decoding = len(body), time.perf_counter()
+                body = body.strip()
+                body = self.json_loader(body.decode("utf-8")) if body else None
+                decode_time = time.perf_counter() - decoding
             else:
                 body = await response.read()
+                size = len(body)
             return Response(path=path,
                             status=response.status,
                             body=body,
                             headers=response.headers,
-                            method=method)
+                            method=method,
+                            size=size,
+                            decode_time=decode_time,
+                            elapsed=time.perf_counter() - start)
 
     __call__ = request
 
-    def close(self):
-        self.session.close()
+    async def close(self, *, timeout=None):
+        """Closes the session, once requests in flight are done
+
+        Parameters:
+            timeout (float): Maximum seconds to wait for requests in flight,
+                             which are aborted afterwards
+        """
+        if self.in_flight and timeout:
+            self._idle = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._idle = None
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+
+async def stream_into(content, sink):
+    """Streams content into sink without buffering it whole
 
-    __del__ = close
+    Parameters:
+        content (StreamReader): Response content
+        sink (Union[bytearray, memoryview, Callable]): a writable buffer,
+            or a function called with each chunk, which may be a coroutine
+    Returns:
+        int: number of bytes streamed
+    Raises:
+        ValueError: content does not fit into buffer
+    """
+    try:
+        view = memoryview(sink)
+    except TypeError:
+        view = None
+    if view is not None and view.readonly:
+        raise ValueError("buffer must be writable")
+    size = 0
+    while True:
+        chunk = await content.readany()
+        if not chunk:
+            return size
+        if view is not None:
+            if size + len(chunk) > len(view):
+                raise ValueError("buffer too small")
+            view[size:size + len(chunk)] = chunk
+        else:
+            result = sink(chunk)
+            if asyncio.iscoroutine(result):
+                await result
+        size += len(chunk)
@@ -1,28 +1,33 @@
 from base64 import b64decode, b64encode
+from copy import deepcopy
+from functools import lru_cache
+from .values import codecs
 import hcl
-import logging
 
-logger = logging.getLogger(__name__)
+
+#: buffer types accepted as raw values, sent without copy
+BYTES_LIKE = (bytes, bytearray, memoryview)
 
 
 def encode_value(value, flags=None, base64=False):
     """Mostly used by payloads
+
+    Value is first encoded by the codec registered for flags, if any.
     """
-    if flags:
-        # still a no-operation
-        logger.debug("Flag %s encoding not implemented yet" % flags)
-    if not isinstance(value, bytes):
+    value = codecs.encode(value, flags)
+    if not isinstance(value, BYTES_LIKE):
         raise ValueError("value must be bytes")
     return b64encode(value) if base64 else value
 
 
 def decode_value(value, flags=None):
     """Mostly used by payloads
+
+    Value is then decoded by the codec registered for flags, if any.
     """
-    if flags:
-        # still a no-operation
-        logger.debug("Flag %s decoding not implemented yet" % flags)
-    return b64decode(value)
+    if value is None:
+        return None
+    return codecs.decode(b64decode(value), flags)
 
 
 def encode_hcl(value):
@@ -32,5 +37,19 @@ def encode_hcl(value):
 
 
 def decode_hcl(value):
+    """Parses HCL rules
+
+    Parsing is memoized by content, because rules of many tokens are
+    generated from the same templates. Each call returns its own copy.
+    """
     if value is not None and value != "":
-        return hcl.loads(value)
+        return deepcopy(_loads_hcl(value))
+
+
+@lru_cache(maxsize=1024)
+def _loads_hcl(value):
+    return hcl.loads(value)
+
+
+decode_hcl.cache_info = _loads_hcl.cache_info
+decode_hcl.cache_clear = _loads_hcl.cache_clear
@@ -0,0 +1,133 @@
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+__all__ = ["ValueCodecs", "codecs", "register",
+           "JSONCodec", "MsgpackCodec", "ZlibCodec", "ZstdCodec"]
+
+
+class ValueCodecs:
+    """Codecs of KV values, keyed by their **Flags**
+
+    Flags are opaque to Consul, their meaning belongs to applications.
+    So nothing is registered by default: values with unregistered flags
+    are kept as bytes, and codecs are opted in by flags.
+    """
+
+    def __init__(self):
+        self.codecs = {}
+
+    def register(self, flags, codec):
+        """Registers codec for flags
+
+        Parameters:
+            flags (int): Flags value
+            codec (Codec): Any object with encode and decode methods
+        Returns:
+            Codec: the codec
+        """
+        if not flags:
+            raise ValueError("flags must be a non zero integer")
+        self.codecs[flags] = codec
+        return codec
+
+    def unregister(self, flags):
+        """Unregisters codec of flags"""
+        self.codecs.pop(flags, None)
+
+    def get(self, flags):
+        return self.codecs.get(flags) if flags else None
+
+    def encode(self, value, flags):
+        codec = self.get(flags)
+        return codec.encode(value) if codec else value
+
+    def decode(self, value, flags):
+        codec = self.get(flags)
+        return codec.decode(value) if codec else value
+
+
+codecs = ValueCodecs()
+register = codecs.register
+
+
+class JSONCodec:
+    """Stores values as compact UTF-8 JSON"""
+
+    def encode(self, value):
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, value):
+        return json.loads(value.decode("utf-8"))
+
+
+class MsgpackCodec:
+    """Stores values as msgpack, requires msgpack"""
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack is required")
+
+    def encode(self, value):
+        return msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, value):
+        return msgpack.unpackb(value, raw=False)
+
+
+class ZlibCodec:
+    """Compresses values with zlib
+
+    Parameters:
+        codec (Codec): Serializes values before compression,
+                       otherwise values are bytes
+        level (int): Compression level
+    """
+
+    def __init__(self, codec=None, *, level=6):
+        self.codec = codec
+        self.level = level
+
+    def encode(self, value):
+        if self.codec:
+            value = self.codec.encode(value)
+        return zlib.compress(value, self.level)
+
+    def decode(self, value):
+        value = zlib.decompress(value)
+        return self.codec.decode(value) if self.codec else value
+
+
+class ZstdCodec:
+    """Compresses values with zstd, requires zstandard
+
+    Parameters:
+        codec (Codec): Serializes values before compression,
+                       otherwise values are bytes
+        level (int): Compression level
+    """
+
+    def __init__(self, codec=None, *, level=3):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required")
+        self.codec = codec
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, value):
+        if self.codec:
+            value = self.codec.encode(value)
+        return self.compressor.compress(value)
+
+    def decode(self, value):
+        value = self.decompressor.decompress(value)
+        return self.codec.decode(value) if self.codec else value
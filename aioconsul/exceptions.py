@@ -1,6 +1,7 @@
 __all__ = [
     "ConsulError",
     "ConflictError",
+    "LimitExceeded",
     "NotFound",
     "SupportDisabled",
     "TransactionError",
@@ -55,6 +56,11 @@ class SupportDisabled(Exception):
     """
 
 
+class LimitExceeded(Exception):
+    """Raised when a request has not been allowed by client limits in time
+    """
+
+
 class TransactionError(Exception):
     """Raised by failing transaction
 
@@ -0,0 +1,312 @@
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict, deque
+
+__all__ = ["Hooks", "MetricsCollector", "path_template"]
+
+
+class Hooks:
+    """Instrumentation interface, every method is a no-op
+
+    Subclasses override the events they are interested in, and are
+    given to :class:`~aioconsul.api.API` or :class:`~aioconsul.Consul`::
+
+        client = Consul("127.0.0.1:8500", hooks=[MyHooks()])
+
+    Without hooks, requests are not instrumented at all.
+    """
+
+    def on_request_start(self, request):
+        """Called before sending request
+
+        Parameters:
+            request (dict): method, path, params, headers and data
+        """
+
+    def on_request_end(self, request, response, *, elapsed, error=None):
+        """Called once request is done
+
+        Parameters:
+            request (dict): The request
+            response (Response): The response, ``None`` on error
+            elapsed (float): Duration of request in seconds
+            error (Exception): Error raised by request, if any
+        """
+
+    def on_retry(self, source, *, attempt, error):
+        """Called when an operation is retried
+
+        Parameters:
+            source (object): The watcher or endpoint retrying
+            attempt (int): Number of retries so far
+            error (Exception): The error that caused the retry
+        """
+
+    def on_watch_wakeup(self, request, response, *, changed):
+        """Called when a blocking query returns
+
+        Parameters:
+            request (dict): The request
+            response (Response): The response
+            changed (bool): ``False`` if the wait expired without change
+        """
+
+    def on_throttle(self, request, *, prefix, waited, queued, error=None):
+        """Called when a limited request leaves the queue
+
+        Parameters:
+            request (dict): The request
+            prefix (str): Prefix of the limit applied
+            waited (float): Seconds spent in queue
+            queued (int): Requests already queued when it arrived
+            error (Exception): Error raised if not allowed in time
+        """
+
+
+#: concrete paths to their template, the first matching wins
+PATH_TEMPLATES = [
+    (re.compile(r"^/v1/kv/.+"), "/v1/kv/{key}"),
+    (re.compile(r"^/v1/query/[^/]+/(execute|explain)$"),
+     r"/v1/query/{query}/\1"),
+    (re.compile(r"^/v1/query/[^/]+$"), "/v1/query/{query}"),
+    (re.compile(r"^/v1/(acl/(?:clone|destroy|info)"
+                r"|agent/check/(?:deregister|update|pass|warn|fail)"
+                r"|agent/service/(?:deregister|maintenance)"
+                r"|agent/(?:join|force-leave)"
+                r"|catalog/(?:node|service)"
+                r"|event/fire"
+                r"|health/(?:checks|node|service|state)"
+                r"|session/(?:destroy|info|node|renew))/.+"),
+     r"/v1/\1/{name}"),
+]
+
+
+def path_template(path):
+    """Returns the template of path, to keep a bounded set of labels
+
+    Parameters:
+        path (str): Concrete path, like ``/v1/kv/foo/bar``
+    Returns:
+        str: Path template, like ``/v1/kv/{key}``
+    """
+    for pattern, template in PATH_TEMPLATES:
+        match = pattern.match(path)
+        if match:
+            return match.expand(template)
+    return path
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsCollector(Hooks):
+    """Collects request metrics, exposed to Prometheus or StatsD
+
+    Example::
+
+        metrics = MetricsCollector()
+        client = Consul("127.0.0.1:8500", hooks=[metrics])
+        ...
+        text = metrics.prometheus()
+        lines = metrics.statsd()
+
+    Metrics are labelled by method and by path template, so
+    ``/v1/kv/foo`` and ``/v1/kv/bar`` share ``/v1/kv/{key}``.
+
+    Attributes:
+        latencies (Mapping): Latency histograms by (method, path)
+        statuses (Counter): Responses by (method, path, status)
+        errors (Counter): Failed requests by (method, path)
+        bytes_in (Counter): Response bytes by path
+        bytes_out (Counter): Request bytes by path
+        decode_time (Counter): Seconds spent decoding responses by path
+        wakeups (Counter): Blocking queries by (path, changed)
+        retries (Counter): Retries by source class name
+        queue_waits (Mapping): Queue wait histograms by limit prefix
+        queue_depths (Mapping): Last queue depth seen by limit prefix
+        rejections (Counter): Requests not allowed in time by limit prefix
+    """
+
+    #: latency buckets, in seconds
+    buckets = (.005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10., 30.,
+               60., 300.)
+
+    def __init__(self, *, buckets=None, timings=10000):
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self.latencies = defaultdict(lambda: Histogram(self.buckets))
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.bytes_in = Counter()
+        self.bytes_out = Counter()
+        self.decode_time = Counter()
+        self.wakeups = Counter()
+        self.retries = Counter()
+        self.queue_waits = defaultdict(lambda: Histogram(self.buckets))
+        self.queue_depths = {}
+        self.rejections = Counter()
+        self._timings = deque(maxlen=timings)
+        self._queue_timings = deque(maxlen=timings)
+        self._flushed = Counter()
+
+    def on_request_end(self, request, response, *, elapsed, error=None):
+        method = request["method"]
+        path = path_template(request["path"])
+        self.latencies[method, path].observe(elapsed)
+        self._timings.append((method, path, elapsed))
+        data = request.get("data")
+        if isinstance(data, (bytes, bytearray, memoryview, str)):
+            self.bytes_out[path] += len(data)
+        if response is None:
+            self.errors[method, path] += 1
+            return
+        self.statuses[method, path, response.status] += 1
+        self.bytes_in[path] += response.size or 0
+        self.decode_time[path] += response.decode_time or 0.
+
+    def on_retry(self, source, *, attempt, error):
+        self.retries[source.__class__.__name__] += 1
+
+    def on_throttle(self, request, *, prefix, waited, queued, error=None):
+        self.queue_waits[prefix].observe(waited)
+        self.queue_depths[prefix] = queued
+        self._queue_timings.append((prefix, waited))
+        if error is not None:
+            self.rejections[prefix] += 1
+
+    def on_watch_wakeup(self, request, response, *, changed):
+        self.wakeups[path_template(request["path"]), changed] += 1
+
+    def prometheus(self, *, namespace="consul"):
+        """Renders metrics in the Prometheus text exposition format
+
+        Parameters:
+            namespace (str): Prefix of metrics names
+        Returns:
+            str: The exposition
+        """
+        lines = []
+
+        def metric(name, kind, help, samples):
+            name = "%s_%s" % (namespace, name)
+            lines.append("# HELP %s %s" % (name, help))
+            lines.append("# TYPE %s %s" % (name, kind))
+            for suffix, labels, value in samples:
+                labels = ",".join('%s="%s"' % (k, escape(v))
+                                  for k, v in labels)
+                lines.append("%s%s{%s} %s" % (name, suffix, labels, value))
+
+        def histograms(items, names):
+            for key, hist in sorted(items):
+                labels = tuple(zip(names, key))
+                for bound, total in hist.cumulative():
+                    yield "_bucket", labels + (("le", bound),), total
+                yield "_sum", labels, hist.sum
+                yield "_count", labels, hist.count
+
+        metric("request_duration_seconds", "histogram",
+               "Duration of requests",
+               histograms(self.latencies.items(), ("method", "path")))
+        metric("responses_total", "counter", "Responses by status", (
+            ("", (("method", m), ("path", p), ("status", s)), v)
+            for (m, p, s), v in sorted(self.statuses.items())))
+        metric("request_errors_total", "counter", "Failed requests", (
+            ("", (("method", m), ("path", p)), v)
+            for (m, p), v in sorted(self.errors.items())))
+        metric("response_bytes_total", "counter", "Bytes received", (
+            ("", (("path", p),), v) for p, v in sorted(self.bytes_in.items())))
+        metric("request_bytes_total", "counter", "Bytes sent", (
+            ("", (("path", p),), v)
+            for p, v in sorted(self.bytes_out.items())))
+        metric("decode_seconds_total", "counter", "Time decoding bodies", (
+            ("", (("path", p),), v)
+            for p, v in sorted(self.decode_time.items())))
+        metric("watch_wakeups_total", "counter", "Blocking queries", (
+            ("", (("path", p), ("changed", str(c).lower())), v)
+            for (p, c), v in sorted(self.wakeups.items())))
+        metric("retries_total", "counter", "Retries", (
+            ("", (("source", s),), v) for s, v in sorted(self.retries.items())))
+        metric("queue_wait_seconds", "histogram", "Time queued by limits",
+               histograms([((p,), h) for p, h in self.queue_waits.items()],
+                          ("prefix",)))
+        metric("queue_depth", "gauge", "Requests queued by limits", (
+            ("", (("prefix", p),), v)
+            for p, v in sorted(self.queue_depths.items())))
+        metric("queue_rejections_total", "counter", "Requests not allowed", (
+            ("", (("prefix", p),), v)
+            for p, v in sorted(self.rejections.items())))
+        return "\n".join(lines) + "\n"
+
+    def statsd(self, *, prefix="consul"):
+        """Renders metrics as StatsD lines, to be sent by the caller
+
+        Parameters:
+            prefix (str): Prefix of metrics names
+        Returns:
+            List[str]: Timings observed and counters incremented
+                       since the previous call
+        """
+        lines = []
+        while self._timings:
+            method, path, elapsed = self._timings.popleft()
+            lines.append("%s.request.%s.%s:%g|ms" % (
+                prefix, method, statsd_name(path), elapsed * 1000))
+        while self._queue_timings:
+            path, waited = self._queue_timings.popleft()
+            lines.append("%s.queue.%s:%g|ms" % (
+                prefix, statsd_name(path), waited * 1000))
+        for path, depth in sorted(self.queue_depths.items()):
+            lines.append("%s.queue_depth.%s:%s|g" % (
+                prefix, statsd_name(path), depth))
+        counters = self._counters()
+        for name, value in sorted(counters.items()):
+            delta = value - self._flushed[name]
+            if delta:
+                lines.append("%s.%s:%s|c" % (prefix, name, delta))
+        self._flushed = counters
+        return lines
+
+    def _counters(self):
+        counters = Counter()
+        for (method, path, status), v in self.statuses.items():
+            counters["response.%s.%s.%s" % (
+                method, statsd_name(path), status)] = v
+        for (method, path), v in self.errors.items():
+            counters["error.%s.%s" % (method, statsd_name(path))] = v
+        for path, v in self.bytes_in.items():
+            counters["bytes_in.%s" % statsd_name(path)] = v
+        for path, v in self.bytes_out.items():
+            counters["bytes_out.%s" % statsd_name(path)] = v
+        for (path, changed), v in self.wakeups.items():
+            counters["wakeup.%s.%s" % (
+                statsd_name(path), "changed" if changed else "expired")] = v
+        for source, v in self.retries.items():
+            counters["retry.%s" % source] = v
+        for path, v in self.rejections.items():
+            counters["rejection.%s" % statsd_name(path)] = v
+        return counters
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def statsd_name(path):
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", path).strip("_")
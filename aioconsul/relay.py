@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from aiohttp import web
+from aioconsul.api import DEFAULT_WAIT, parse_wait
+from aioconsul.common import RequestHandler
+from collections import Counter, OrderedDict, namedtuple
+from multidict import CIMultiDict
+
+__all__ = ["WatchRelay"]
+
+logger = logging.getLogger(__name__)
+
+Reply = namedtuple("Reply", "status headers body")
+
+#: parameters of blocking queries, ignored to group identical watches
+BLOCKING_PARAMS = ("index", "wait")
+
+#: request headers forwarded to the agent
+FORWARDED_HEADERS = ("Content-Type", "X-Consul-Token")
+
+
+class WatchRelay:
+    """Shares the requests of many processes through a Unix socket
+
+    Worker processes connect to the relay instead of the agent, through
+    the same client::
+
+        # in the relay process, or a sidecar
+        relay = WatchRelay("127.0.0.1:8500", "/run/consul.sock")
+        await relay.start()
+
+        # in each worker process
+        client = Consul("unix:///run/consul.sock")
+        tree, meta = await client.kv.get_tree("config/")
+        tree, meta = await client.kv.get_tree("config/", watch=meta)
+
+    Identical GET requests in flight, by path, parameters and token, are
+    sent once to the agent and their reply is shared. So once workers
+    see the same index, their blocking queries become a single watch.
+    The latest reply of each blocking query is also kept, and returned
+    right away to the workers still waiting on an older index.
+    Other methods are forwarded as is.
+
+    Each request to the agent is bounded by ``timeout`` seconds, plus the
+    wait of blocking queries and its jitter. Past it, the workers get a
+    504 reply.
+
+    Parameters:
+        address (str): Address of the agent
+        path (str): Path of the Unix socket to listen to
+        max_replies (int): Maximum number of replies kept
+        timeout (float): Seconds allowed to requests to the agent,
+                         on top of the wait of blocking queries
+
+    Attributes:
+        stats (Counter): ``requests``, ``upstream``, ``coalesced``,
+                         ``cached`` and ``timeouts``
+    """
+
+    def __init__(self, address, path, *, max_replies=1024, timeout=10.,
+                 loop=None):
+        self.handler = RequestHandler(address, loop=loop)
+        self.path = path
+        self.max_replies = max_replies
+        self.timeout = timeout
+        self.stats = Counter()
+        self._flights = {}
+        self._replies = OrderedDict()
+        self._runner = None
+
+    async def start(self):
+        """Listens to the Unix socket"""
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.UnixSite(self._runner, self.path).start()
+
+    async def close(self):
+        """Stops listening, then closes connections to the agent"""
+        runner, self._runner = self._runner, None
+        if runner is not None:
+            await runner.cleanup()
+        await self.handler.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def handle(self, request):
+        """Serves a request of a worker"""
+        self.stats["requests"] += 1
+        headers = {k: request.headers[k]
+                   for k in FORWARDED_HEADERS if k in request.headers}
+        params = sorted(request.query.items())
+        if request.method != "GET":
+            reply = await self._fetch(request.method, request.path, params,
+                                      headers, await request.read())
+            return render(reply)
+
+        watch = (request.path, tuple(sorted(headers.items())),
+                 tuple(p for p in params if p[0] not in BLOCKING_PARAMS))
+        reply = self._replies.get(watch)
+        if reply and newer(reply, request.query.get("index")):
+            self.stats["cached"] += 1
+            return render(reply)
+
+        key = watch + (tuple(params),)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._fetch(
+                "GET", request.path, params, headers, None, watch=watch))
+            flight.add_done_callback(lambda f: self._flights.pop(key, None))
+            self._flights[key] = flight
+        else:
+            self.stats["coalesced"] += 1
+        # workers may go away, others still wait for the reply
+        return render(await asyncio.shield(flight))
+
+    async def _fetch(self, method, path, params, headers, data, *,
+                     watch=None):
+        self.stats["upstream"] += 1
+        try:
+            reply = await asyncio.wait_for(
+                self._forward(method, path, params, headers, data),
+                self._timeout_of(params))
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning("%r timed out to %s %s", self, method, path)
+            return Reply(504, {"Content-Type": "text/plain"},
+                         b"agent timed out")
+        except Exception as error:
+            logger.warning("%r failed to %s %s: %s", self, method, path, error)
+            return Reply(502, {"Content-Type": "text/plain"},
+                         str(error).encode("utf-8"))
+        if watch and reply.status == 200 and "X-Consul-Index" in reply.headers:
+            self._replies[watch] = reply
+            self._replies.move_to_end(watch)
+            while len(self._replies) > self.max_replies:
+                self._replies.popitem(last=False)
+        return reply
+
+    async def _forward(self, method, path, params, headers, data):
+        url = "%s/%s" % (self.handler.url, path.lstrip("/"))
+        async with self.handler.session.request(
+                method, url, params=params, headers=headers,
+                data=data) as response:
+            return Reply(status=response.status,
+                         headers=relayed_headers(response.headers),
+                         body=await response.read())
+
+    def _timeout_of(self, params):
+        """Seconds allowed to a request with params"""
+        params = dict(params)
+        if params.get("index") is None:
+            return self.timeout
+        # Consul adds up to wait / 16 of jitter
+        wait = parse_wait(params.get("wait")) or DEFAULT_WAIT
+        return self.timeout + wait * 17 / 16
+
+    def __repr__(self):
+        return "<%s(%r, path=%r)>" % (self.__class__.__name__,
+                                      str(self.handler.address), self.path)
+
+
+def relayed_headers(headers):
+    return CIMultiDict((k, v) for k, v in headers.items() if relayed(k))
+
+
+def relayed(header):
+    name = header.lower()
+    return name == "content-type" or name.startswith("x-consul-")
+
+
+def newer(reply, index):
+    """Tells if reply is newer than the index of a blocking query"""
+    try:
+        return int(reply.headers["X-Consul-Index"]) > int(index)
+    except (TypeError, ValueError):
+        return False
+
+
+def render(reply):
+    return web.Response(status=reply.status, headers=reply.headers,
+                        body=reply.body)
@@ -0,0 +1,58 @@
+"""Times prepare_* helpers over large batches of each shape
+
+Usage::
+
+    python benchmarks/bench_prepare.py [size]
+"""
+
+import sys
+import timeit
+from aioconsul.client.util import prepare_node, prepare_service
+from aioconsul.client.util import prepare_check
+
+
+def health(i):
+    return {
+        "Node": {"Node": "node%s" % i, "Address": "10.0.%s.%s" % divmod(
+            i % 65536, 256)},
+        "Service": {"ID": "web%s" % i, "Service": "web", "Tags": ["v1"],
+                    "Address": "", "Port": 80},
+        "Checks": []
+    }
+
+
+def entry(i):
+    return {"Node": "node%s" % i, "Address": "10.0.0.1",
+            "CheckID": "service:web%s" % i, "Name": "web check",
+            "Status": "passing", "Notes": "", "Output": "",
+            "ServiceID": "web%s" % i, "ServiceName": "web",
+            "ServiceTags": ["v1"], "ServiceAddress": "", "ServicePort": 80}
+
+
+def definition(i):
+    return {"ID": "web%s" % i, "Name": "web", "Node": "node%s" % i,
+            "Address": "10.0.0.1", "Tags": ["v1"], "Port": 80}
+
+
+CASES = [
+    ("node/health", health, prepare_node),
+    ("node/definition", definition, prepare_node),
+    ("service/health", health, prepare_service),
+    ("service/entry", entry, prepare_service),
+    ("service/definition", definition, prepare_service),
+    ("check/entry", entry, prepare_check),
+]
+
+
+def main(size=100000, repeat=5):
+    print("%-20s %12s %12s" % ("case", "total (ms)", "item (us)"))
+    for name, factory, prepare in CASES:
+        data = [factory(i) for i in range(size)]
+        elapsed = min(timeit.repeat(lambda: [prepare(obj) for obj in data],
+                                    number=1, repeat=repeat))
+        print("%-20s %12.1f %12.2f" % (name, elapsed * 1000,
+                                       elapsed / size * 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
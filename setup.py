@@ -35,11 +35,13 @@ setup(
         'Topic :: System :: Networking :: Monitoring',
     ],
     install_requires=[
-        'aiohttp>=1.0.2',
+        'aiohttp>=3.1',
+        'multidict>=4.0',
         'python-dateutil>=2.5.3',
         'pyhcl>=0.2.1',
         'wheel>0.25.0'
     ],
     license='BSD',
+    python_requires='>=3.5.3',
     cmdclass=versioneer.get_cmdclass()
 )
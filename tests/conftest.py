@@ -89,4 +89,6 @@ def client(server, event_loop):
         for query in queries:
             await consul.query.delete(query)
 
+        await consul.close()
+
     event_loop.run_until_complete(cleanup(consul))
@@ -1,4 +1,8 @@
 import pytest
+from aioconsul.client import ACLEvaluator, ACLPolicy
+from aioconsul.client.acl_endpoint import decode_token, encode_token
+from aioconsul.client.acl_endpoint import LazyRules
+from aioconsul.encoders import decode_hcl
 from collections.abc import Mapping
 
 
@@ -100,3 +104,89 @@ async def test_rules(client, input, expected):
 
     info, meta = await client.acl.info(token)
     assert info["Rules"] == expected
+
+
+RULES = """
+key "" {
+    policy = "read"
+}
+key "private/" {
+    policy = "deny"
+}
+"""
+
+
+def test_decode_token():
+    token = {"ID": "foo", "Rules": RULES}
+    expected = {"key": {"": {"policy": "read"},
+                        "private/": {"policy": "deny"}}}
+    decode_hcl.cache_clear()
+    a = decode_token(token)
+    b = decode_token(token)
+    assert a["Rules"] == b["Rules"] == expected
+    assert a["Rules"] is not b["Rules"]
+    assert decode_hcl.cache_info().hits == 1
+
+    lazy = decode_token(token, rules="lazy")
+    assert isinstance(lazy["Rules"], LazyRules)
+    assert lazy["Rules"] == expected
+    assert encode_token(lazy)["Rules"] == RULES
+
+    raw = decode_token(token, rules="raw")
+    assert raw["Rules"] == RULES
+
+    with pytest.raises(ValueError):
+        decode_token(token, rules="foo")
+
+
+@pytest.mark.parametrize("resource, name, access, expected", [
+    ("key", "foo", "read", True),
+    ("key", "foo", "write", False),
+    ("key", "private/foo", "read", False),
+    ("key", "private/public/foo", "write", True),
+    ("service", "web", "write", True),
+    ("service", "db", "read", False),
+    ("event", "deploy", "read", False),
+    ("keyring", "", "read", True),
+    ("keyring", "", "write", False),
+])
+def test_evaluator(resource, name, access, expected):
+    evaluator = ACLEvaluator(None, default="deny")
+    evaluator.load([{
+        "ID": "foo",
+        "Type": "client",
+        "Rules": RULES + """
+key "private/public/" {
+    policy = "write"
+}
+service "web" {
+    policy = "write"
+}
+keyring = "read"
+"""
+    }, {
+        "ID": "bar",
+        "Type": "management",
+        "Rules": ""
+    }])
+    assert evaluator.allowed("foo", resource, name, access) is expected
+    assert evaluator.allowed({"ID": "bar"}, resource, name, "write")
+    assert not evaluator.allowed("unknown", resource, name, "read")
+    assert not evaluator.allowed(None, resource, name, "read")
+
+
+def test_policy_default():
+    policy = ACLPolicy({"key": {"foo/": {"policy": "deny"}}},
+                       default="allow")
+    assert policy.allowed("key", "bar", "write")
+    assert not policy.allowed("key", "foo/bar", "read")
+
+
+@pytest.mark.parametrize("resource", ["agent", "node", "session"])
+def test_policy_prefixed(resource):
+    policy = ACLPolicy({resource: {"": {"policy": "read"},
+                                   "web": {"policy": "write"}}})
+    assert policy.policy(resource, "web1") == "write"
+    assert policy.allowed(resource, "web", "write")
+    assert policy.allowed(resource, "db", "read")
+    assert not policy.allowed(resource, "db", "write")
@@ -1,4 +1,12 @@
+import asyncio
+import logging
 import pytest
+from aioconsul import Consul, LimitExceeded
+from aioconsul.api import API, ResponseLog, parse_wait
+from aioconsul.client.bases import EndpointBase, Watcher
+from aioconsul.common import RequestHandler, Response
+from aioconsul.common import deadline, get_deadline
+from aioconsul.hooks import MetricsCollector
 
 
 @pytest.mark.asyncio
@@ -15,3 +23,176 @@ async def test_consistency(client, attr, consistency, params):
     api = client.api
     api.consistency = attr
     await api.get("/v1/agent/self", consistency=consistency, params=params)
+
+
+def test_response_log(caplog):
+    log = ResponseLog()
+    body = {"Key%s" % i: "x" * 10000 for i in range(1000)}
+    response = Response("/v1/kv/foo", 200, body, {}, "GET",
+                        size=10 ** 7, elapsed=.0123)
+    log(response)
+    assert not caplog.records
+
+    caplog.set_level(logging.DEBUG, logger="aioconsul.api")
+    log(response)
+    record = caplog.records[-1]
+    assert record.getMessage() == "GET /v1/kv/foo 200 12.3ms 10000000B"
+    assert record.consul["size"] == 10 ** 7
+
+    log.bodies, log.body_limit = True, 100
+    log(response)
+    message = caplog.records[-1].getMessage()
+    assert "{'Key0': 'xxx" in message
+    assert len(message) < 200
+
+    log.sample_rate = 0.
+    log(response)
+    assert len(caplog.records) == 2
+
+
+class SlowHandler:
+
+    address = "127.0.0.1:8500"
+
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, method, path, *, timeout=None, **kwargs):
+        self.requests.append(dict(kwargs, timeout=timeout))
+        if path == "/v1/status/leader":
+            await asyncio.sleep(1)
+        return Response(path, 200, [], {}, method)
+
+    async def close(self, **kwargs):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_deadline():
+    api = API("127.0.0.1:8500")
+    api.req_handler = handler = SlowHandler()
+
+    await api.get("/v1/kv/foo", watch=(12, "10m"))
+    assert handler.requests[-1]["params"]["wait"] == "10m"
+    assert handler.requests[-1]["timeout"] is None
+
+    with deadline(2.):
+        assert get_deadline() is not None
+        with deadline(10.) as limit:
+            assert limit == get_deadline()
+            await api.get("/v1/kv/foo", watch=(12, "10m"))
+        wait = parse_wait(handler.requests[-1]["params"]["wait"])
+        assert 1.7 < wait < 2 * 16 / 17
+        assert 1.9 < handler.requests[-1]["timeout"] <= 2
+
+        await api.get("/v1/kv/foo", watch=(12, "1s"))
+        assert handler.requests[-1]["params"]["wait"] == "1s"
+    assert get_deadline() is None
+
+    await api.get("/v1/kv/foo", watch=12, timeout=.5)
+    assert parse_wait(handler.requests[-1]["params"]["wait"]) < .5
+
+    api.req_handler = RequestHandler("127.0.0.1:8500")
+    api.req_handler._session = FakeSession()
+    with pytest.raises(asyncio.TimeoutError):
+        await api.get("/v1/status/leader", timeout=.01)
+    with deadline(0):
+        with pytest.raises(asyncio.TimeoutError):
+            await api.get("/v1/status/leader")
+
+
+@pytest.mark.asyncio
+async def test_limits():
+    metrics = MetricsCollector()
+    api = API("127.0.0.1:8500", hooks=[metrics])
+    api.req_handler = handler = SlowHandler()
+    assert not api.apply.__qualname__.startswith("limit_middleware")
+
+    catalog = api.limit("/v1/catalog", concurrency=1, max_wait=0)
+    leader = api.limit("/v1/status/leader", concurrency=1, max_wait=.05)
+    api.limit("/v1/kv/", methods=["put"], rate=1, max_wait=0)
+    assert api.apply.__qualname__.startswith("limit_middleware")
+
+    await api.get("/v1/kv/foo")
+    await api.get("/v1/kv/foo")
+    await api.put("/v1/kv/foo", data=b"bar")
+    with pytest.raises(LimitExceeded):
+        await api.put("/v1/kv/foo", data=b"bar")
+
+    running = asyncio.ensure_future(api.get("/v1/status/leader"))
+    await asyncio.sleep(0)
+    assert leader.in_flight == 1 and catalog.in_flight == 0
+    await api.get("/v1/catalog/nodes")
+    with pytest.raises(LimitExceeded):
+        await api.get("/v1/status/leader")
+    with deadline(.01):
+        with pytest.raises(asyncio.TimeoutError):
+            await api.get("/v1/status/leader")
+    await running
+    assert leader.in_flight == 0
+    assert handler.requests[-1]["timeout"] is None
+
+    assert metrics.rejections == {"/v1/kv/": 1, "/v1/status/leader": 2}
+    assert metrics.queue_waits["/v1/catalog"].count == 1
+    assert "consul_queue_depth{prefix=\"/v1/status/leader\"} 0" \
+        in metrics.prometheus()
+    assert "consul.rejection.v1_status_leader:2|c" in metrics.statsd()
+
+    api.remove_limit(leader)
+    api.remove_limit(catalog)
+    assert [limit.prefix for limit in api.limits] == ["/v1/kv/"]
+
+
+class FakeSession:
+
+    closed = False
+
+    def request(self, method, url, **kwargs):
+        return self
+
+    async def __aenter__(self):
+        await asyncio.sleep(1)
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def close(self, **kwargs):
+        pass
+
+
+class LeaderWatcher(Watcher):
+
+    def __init__(self, api):
+        super().__init__()
+        self._endpoint = EndpointBase(api)
+
+    async def fetch(self, *, watch=None):
+        return await self._endpoint._api.get("/v1/status/leader"), {}
+
+
+@pytest.mark.asyncio
+async def test_close():
+    async with Consul("127.0.0.1:8500") as client:
+        handler = client.api.req_handler
+        assert handler._session is None
+        session = handler.session
+        assert handler.session is session
+    assert session.closed and handler._session is None
+
+    client.api.req_handler._session = FakeSession()
+    watcher = LeaderWatcher(client.api)
+    watcher.start()
+    request = asyncio.ensure_future(client.api.get("/v1/status/leader"))
+    await asyncio.sleep(0)
+    assert handler.in_flight == 2
+    await client.close(timeout=.01)
+    assert not watcher.running
+    assert handler.in_flight == 1 and handler._session is None
+    request.cancel()
+
+
+@pytest.mark.parametrize("wait, expected", [
+    ("10s", 10.), ("1m30s", 90.), ("250ms", .25), (None, None),
+])
+def test_parse_wait(wait, expected):
+    assert parse_wait(wait) == expected
@@ -1,4 +1,7 @@
+import asyncio
 import pytest
+from aioconsul.client import CatalogEndpoint, CatalogSnapshot
+from aioconsul.common import Response
 from collections.abc import Mapping, Sequence
 
 
@@ -109,3 +112,232 @@ def extract_node(data, name, address):
     for d in data:
         if d["Address"] == address and d["Node"] == name:
             return d
+
+
+NODES = [
+    {"Node": "n1", "Address": "10.0.0.1", "Meta": {"rack": "a"}},
+    {"Node": "n2", "Address": "10.0.0.2", "Meta": {"rack": "b"}},
+]
+
+SERVICES = {
+    "redis": [
+        {"Node": "n1", "Address": "10.0.0.1", "ServiceID": "redis1",
+         "ServiceName": "redis", "ServiceTags": ["master", "v1"],
+         "ServiceAddress": "", "ServicePort": 6379},
+        {"Node": "n2", "Address": "10.0.0.2", "ServiceID": "redis2",
+         "ServiceName": "redis", "ServiceTags": ["slave", "v1"],
+         "ServiceAddress": "10.0.1.2", "ServicePort": 6379},
+    ],
+    "web": [
+        {"Node": "n2", "Address": "10.0.0.2", "ServiceID": "web",
+         "ServiceName": "web", "ServiceTags": None,
+         "ServiceAddress": "", "ServicePort": 80},
+    ]
+}
+
+
+CACHE = {"Node": "n1", "Address": "10.0.0.1", "ServiceID": "cache",
+         "ServiceName": "cache", "ServiceTags": None,
+         "ServiceAddress": "", "ServicePort": 11211}
+
+
+class FakeCatalog:
+
+    class _api:
+        address = "127.0.0.1:8500"
+
+    def __init__(self):
+        self.index = 1
+        self.catalog = dict(SERVICES)
+        self.indexes = {name: 1 for name in SERVICES}
+        self.changed = asyncio.Event()
+        self.failing = False
+        self.calls = []
+
+    async def nodes(self, *, dc=None, watch=None):
+        self.calls.append(("nodes", watch))
+        if self.failing:
+            raise ValueError("boom")
+        if watch:
+            await asyncio.sleep(1)
+        return NODES, {"Index": 1}
+
+    async def services(self, *, dc=None, watch=None):
+        self.calls.append(("services", watch))
+        if watch:
+            await self.changed.wait()
+        return {k: sorted(set(tag for entry in v
+                              for tag in entry["ServiceTags"] or ()))
+                for k, v in self.catalog.items()}, {"Index": self.index}
+
+    async def service(self, name, *, dc=None, watch=None):
+        self.calls.append((name, watch))
+        return self.catalog.get(name, []), {"Index": self.indexes[name]}
+
+
+def test_snapshot_query():
+    snapshot = CatalogSnapshot(None)
+    snapshot.load({"Nodes": NODES, "Services": SERVICES})
+
+    def ids(entries):
+        return [entry["ServiceID"] for entry in entries]
+
+    assert ids(snapshot.query()) == ["redis1", "redis2", "web"]
+    assert ids(snapshot.query(service="redis")) == ["redis1", "redis2"]
+    assert ids(snapshot.query(tag=["v1", "master"])) == ["redis1"]
+    assert ids(snapshot.query(node="n2")) == ["redis2", "web"]
+    assert ids(snapshot.query(address="10.0.0.2")) == ["web"]
+    assert ids(snapshot.query(meta={"rack": "b"}, tag="v1")) == ["redis2"]
+    assert ids(snapshot.query(service="redis", tag="unknown")) == []
+    assert snapshot.services == {"redis": ["master", "slave", "v1"],
+                                 "web": []}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_refresh():
+    endpoint = FakeCatalog()
+    snapshot = CatalogSnapshot(endpoint, wait="1s")
+    assert await snapshot.refresh() is True
+    assert snapshot.index == (1, 1)
+    assert len(snapshot.entries) == 3
+
+    def fetched():
+        return [call[0] for call in endpoint.calls if call[1] is None]
+
+    # a new instance with the same tags, every service is fetched again
+    endpoint.calls[:] = []
+    endpoint.index = endpoint.indexes["web"] = 2
+    endpoint.catalog["web"] = SERVICES["web"] + [
+        dict(SERVICES["web"][0], Node="n1", Address="10.0.0.1")
+    ]
+    endpoint.changed.set()
+    assert await snapshot.refresh() is True
+    assert snapshot.index == (1, 2)
+    assert len(snapshot.query(service="web")) == 2
+    assert ("services", (1, "1s")) in endpoint.calls
+    assert ("nodes", (1, "1s")) in endpoint.calls
+    assert sorted(fetched()) == ["redis", "web"]
+
+    # web disappears, cache appears, only cache is fetched
+    endpoint.calls[:] = []
+    endpoint.index = endpoint.indexes["cache"] = 3
+    endpoint.catalog["cache"] = [CACHE]
+    del endpoint.catalog["web"]
+    assert await snapshot.refresh() is True
+    assert snapshot.index == (1, 3)
+    assert sorted(snapshot.services) == ["cache", "redis"]
+    assert fetched() == ["cache"]
+
+    # redis changes its tags, only redis is fetched
+    endpoint.calls[:] = []
+    endpoint.index = endpoint.indexes["redis"] = 4
+    endpoint.catalog["redis"] = SERVICES["redis"][:1]
+    assert await snapshot.refresh() is True
+    assert snapshot.index == (1, 4)
+    assert snapshot.services["redis"] == ["master", "v1"]
+    assert fetched() == ["redis"]
+    assert ("nodes", (1, "1s")) not in endpoint.calls
+
+    await snapshot.stop()
+    assert not snapshot._watches
+
+
+@pytest.mark.asyncio
+async def test_snapshot_failed_watch():
+    endpoint = FakeCatalog()
+    snapshot = CatalogSnapshot(endpoint, wait="1s")
+    assert await snapshot.refresh() is True
+
+    # the services watch completed along the failed one, and is kept
+    endpoint.failing = True
+    endpoint.index = endpoint.indexes["cache"] = 2
+    endpoint.catalog["cache"] = [CACHE]
+    endpoint.changed.set()
+    assert await snapshot.refresh() is True
+    assert snapshot.index == (1, 2)
+    assert "cache" in snapshot.services
+
+    endpoint.calls[:] = []
+    endpoint.changed.clear()
+    with pytest.raises(ValueError):
+        await snapshot.refresh()
+    assert snapshot.index == (1, 2)
+    await snapshot.stop()
+
+
+def test_snapshot_restore(tmpdir):
+    path = str(tmpdir.join("catalog"))
+    snapshot = CatalogSnapshot(None)
+    snapshot.load({"Nodes": NODES, "Services": SERVICES})
+    snapshot.index = (1, 2)
+    snapshot.save(path)
+
+    snapshot = CatalogSnapshot(None)
+    assert snapshot.restore(path) is True
+    assert snapshot.index == (1, 2)
+    assert len(snapshot.query(service="redis")) == 2
+
+
+class FakeRegistry:
+
+    address = "127.0.0.1:8500"
+
+    def __init__(self):
+        self.bodies = []
+
+    async def put(self, path, *, data):
+        if data["Node"] == "bad":
+            raise ValueError("boom")
+        self.bodies.append((path, data))
+        return Response(path, 200, True, {}, "PUT")
+
+
+@pytest.mark.asyncio
+async def test_register_many():
+    api = FakeRegistry()
+    endpoint = CatalogEndpoint(api)
+    snapshot = CatalogSnapshot(None)
+    snapshot.load({"Nodes": NODES, "Services": SERVICES})
+    entries = [
+        {"Node": "n1", "Address": "10.0.0.1", "NodeMeta": {"rack": "a"},
+         "Service": {"ID": "redis1", "Service": "redis",
+                     "Tags": ["v1", "master"], "Port": 6379}},
+        {"Node": "n1", "Address": "10.0.0.1", "NodeMeta": {"rack": "a"},
+         "Service": {"ID": "redis1", "Service": "redis", "Port": 6380}},
+        {"Node": "n2", "Address": "10.0.0.2", "NodeMeta": {"rack": "b"}},
+        {"Node": "n3", "Address": "10.0.0.3",
+         "Check": {"CheckID": "mem", "Name": "mem", "Status": "passing"}},
+        {"Node": "bad", "Address": "10.0.0.4"},
+    ]
+    results = await endpoint.register_many(entries, concurrency=2,
+                                           rate=1000, snapshot=snapshot)
+    assert results[:4] == [None, True, None, True]
+    assert list(results.errors) == [4]
+    assert results.failed
+    assert [body["Node"] for _, body in api.bodies] == ["n1", "n3"]
+    assert api.bodies[0][1]["Service"]["Port"] == 6380
+    assert api.bodies[1][1]["Check"]["Node"] == "n3"
+
+    # entries of /v1/health/service/<service> keep service and checks
+    api.bodies[:] = []
+    health = {
+        "Node": {"Node": "n4", "Address": "10.0.0.4"},
+        "Service": {"ID": "web4", "Service": "web", "Port": 80},
+        "Checks": [{"Node": "n4", "CheckID": "serfHealth", "Name": "Serf",
+                    "Status": "passing", "Output": "Agent alive"}]
+    }
+    results = await endpoint.register_many([health], snapshot=snapshot)
+    assert results == [True]
+    assert api.bodies == [("/v1/catalog/register", {
+        "Node": "n4", "Address": "10.0.0.4",
+        "Service": {"ID": "web4", "Service": "web", "Port": 80},
+        "Checks": [{"Node": "n4", "CheckID": "serfHealth", "Name": "Serf",
+                    "Status": "passing"}]
+    })]
+    assert health["Node"] == {"Node": "n4", "Address": "10.0.0.4"}
+
+    results = await endpoint.deregister_many(["n1", {"Node": "n2",
+                                                     "ServiceID": "web"}])
+    assert results == [True, True]
+    assert api.bodies[-1] == ("/v1/catalog/deregister",
+                              {"Node": "n2", "ServiceID": "web"})
@@ -1,6 +1,10 @@
+import asyncio
 import pytest
 from aioconsul.common import Address, parse_addr
 from aioconsul.common import duration_to_timedelta, timedelta_to_duration
+from aioconsul import LimitExceeded
+from aioconsul.common import Governor, TokenBucket
+from aioconsul.common import read_state, stream_into, write_state
 from datetime import timedelta
 
 
@@ -37,3 +41,74 @@ def test_duration(a, b):
 ])
 def test_addr(input, expected):
     assert parse_addr(input) == expected
+
+
+def test_state(tmpdir):
+    path = str(tmpdir.join("state"))
+    state = {"Index": [1, 2], "Value": [{"Key": "foo", "Value": b"bar"}]}
+    write_state(path, state)
+    assert read_state(path) == state
+    assert tmpdir.listdir() == [tmpdir.join("state")]
+
+
+class FakeContent:
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+
+    async def readany(self):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+@pytest.mark.asyncio
+async def test_stream_into():
+    buf = bytearray(8)
+    assert await stream_into(FakeContent(b"foo", b"bar"), buf) == 6
+    assert buf == b"foobar\0\0"
+
+    with pytest.raises(ValueError):
+        await stream_into(FakeContent(b"foo", b"bar"), bytearray(4))
+    with pytest.raises(ValueError):
+        await stream_into(FakeContent(b"foo"), bytes(4))
+
+    chunks = []
+
+    async def write(chunk):
+        chunks.append(chunk)
+    assert await stream_into(FakeContent(b"foo", b"bar"), write) == 6
+    assert chunks == [b"foo", b"bar"]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket():
+    bucket = TokenBucket(100, burst=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert 0 < bucket.delay() <= .01
+    await bucket.acquire()
+    assert not bucket.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_governor():
+    governor = Governor(concurrency=1, max_wait=.05)
+    assert await governor.acquire() == 0.
+    with pytest.raises(LimitExceeded):
+        await governor.acquire()
+    with pytest.raises(LimitExceeded):
+        await governor.acquire(timeout=0)
+    assert (governor.in_flight, governor.waiting) == (1, 0)
+
+    waiter = asyncio.ensure_future(governor.acquire(timeout=1))
+    await asyncio.sleep(0)
+    assert governor.waiting == 1
+    governor.release()
+    assert 0 < await waiter < 1
+    assert (governor.in_flight, governor.waiting) == (1, 0)
+    governor.release()
+
+    governor = Governor(rate=100, burst=1, max_wait=0)
+    await governor.acquire()
+    governor.release()
+    with pytest.raises(LimitExceeded):
+        await governor.acquire()
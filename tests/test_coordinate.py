@@ -1,4 +1,6 @@
 import pytest
+from aioconsul.client import CoordinateCache
+from aioconsul.client.coordinate_endpoint import rtt, rtt_matrix
 from collections.abc import Mapping, Sequence
 
 
@@ -24,3 +26,64 @@ async def test_nodes(client):
     assert "Index" in meta
     assert "KnownLeader" in meta
     assert "LastContact" in meta
+
+
+def coord(*vec, height=0, adjustment=0):
+    vec = list(vec) + [0] * (8 - len(vec))
+    return {"Vec": vec, "Height": height, "Adjustment": adjustment,
+            "Error": 1.5}
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    (coord(), coord(), 0),
+    (coord(.003), coord(0, .004), .005),
+    (coord(.003, height=.001), coord(0, .004, height=.002), .008),
+    (coord(.003, adjustment=.001), coord(adjustment=.001), .005),
+    (coord(.003, adjustment=-.004), coord(), .003),
+])
+def test_rtt(a, b, expected):
+    assert rtt(a, b) == pytest.approx(expected)
+
+
+def test_rtt_matrix():
+    coords = [coord(), coord(.003), coord(0, .004)]
+    matrix = rtt_matrix(coords, coords)
+    expected = [0, .003, .004, .003, 0, .005, .004, .005, 0]
+    assert [x for row in matrix for x in row] == pytest.approx(expected)
+
+
+def test_cache():
+    cache = CoordinateCache(None)
+    cache.load([
+        {"Node": "a", "Coord": coord()},
+        {"Node": "b", "Coord": coord(.003)},
+        {"Node": "c", "Coord": coord(.001)},
+    ])
+    items = [
+        {"Node": {"Node": "b"}, "Service": {}, "Checks": []},
+        {"Node": {"Node": "unknown"}, "Service": {}, "Checks": []},
+        {"Node": {"Node": "c"}, "Service": {}, "Checks": []},
+        {"Node": {"Node": "a"}, "Service": {}, "Checks": []},
+    ]
+    result = cache.sort(items, near="a")
+    assert [obj["Node"]["Node"] for obj in result] == [
+        "a", "c", "b", "unknown"
+    ]
+    assert cache.sort(["b", "a"], near={"Node": "a"}) == ["a", "b"]
+    assert cache.rtt("a", "b") == pytest.approx(.003)
+    assert cache.rtt("a", "unknown") is None
+    assert "a" in cache
+    names, matrix = cache.matrix()
+    assert names == ["a", "b", "c"]
+    assert matrix[1][2] == pytest.approx(.002)
+
+
+def test_sort_datacenters():
+    cache = CoordinateCache(None)
+    cache.datacenters = {
+        "dc1": [coord(), coord(.001)],
+        "dc2": [coord(.05), coord(.06)],
+        "dc3": [coord(.02), coord(.03)],
+    }
+    assert cache.sort_datacenters("dc1") == ["dc1", "dc3", "dc2"]
+    assert cache.sort_datacenters("dc2") == ["dc2", "dc3", "dc1"]
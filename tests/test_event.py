@@ -1,4 +1,5 @@
 import pytest
+from aioconsul.client import EventStream
 from collections.abc import Mapping, Sequence
 
 
@@ -42,3 +43,56 @@ async def test_payload(client):
     assert elt["ID"] == event["ID"]
     assert elt["Name"] == event["Name"]
     assert elt["Payload"] == event["Payload"]
+
+
+class FakeEvents:
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.watches = []
+
+    async def items(self, name=None, *, watch=None):
+        self.watches.append(watch)
+        return self.responses.pop(0)
+
+
+def event(id, ltime, name="deploy"):
+    return {"ID": id, "Name": name, "LTime": ltime, "Payload": None}
+
+
+@pytest.mark.asyncio
+async def test_stream():
+    endpoint = FakeEvents(
+        ([event("a", 1)], {"Index": 10}),
+        ([event("a", 1), event("c", 3), event("b", 2)], {"Index": 11}),
+        ([event("c", 3), event("d", 4)], {"Index": 12}),
+    )
+    stream = EventStream(endpoint, "deploy", wait="10s")
+    events = []
+    async for obj in stream:
+        events.append(obj["ID"])
+        if len(events) == 3:
+            break
+    assert events == ["b", "c", "d"]
+    assert endpoint.watches == [None, (10, "10s"), (11, "10s")]
+
+
+@pytest.mark.asyncio
+async def test_stream_history():
+    endpoint = FakeEvents(([event("b", 2), event("a", 1)], {"Index": 10}))
+    stream = EventStream(endpoint, history=True)
+    assert [obj["ID"] for obj in await stream.poll()] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_stream_forget():
+    endpoint = FakeEvents(
+        ([event("a", 1), event("b", 2)], {"Index": 10}),
+        ([event("c", 3)], {"Index": 11}),
+        ([event("a", 1), event("b", 2), event("d", 4)], {"Index": 12}),
+    )
+    stream = EventStream(endpoint)
+    stream.size = 2
+    await stream.poll()
+    assert [obj["ID"] for obj in await stream.poll()] == ["c"]
+    assert [obj["ID"] for obj in await stream.poll()] == ["d"]
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from aioconsul.client import Fanout, FanoutResult
+from aioconsul.client.bases import EndpointBase
+
+
+class FakeCatalog(EndpointBase):
+
+    def __init__(self):
+        super().__init__(None)
+        self.running = self.concurrency = 0
+
+    async def datacenters(self):
+        return ["dc1", "dc2", "dc3"]
+
+    async def services(self, *, dc=None):
+        self.running += 1
+        self.concurrency = max(self.concurrency, self.running)
+        try:
+            if dc == "dc2":
+                raise ValueError("boom")
+            if dc == "dc3":
+                await asyncio.sleep(1)
+            await asyncio.sleep(0.01)
+            return {"consul": []}, {"Index": dc}
+        finally:
+            self.running -= 1
+
+
+class FakeClient:
+    address = "127.0.0.1:8500"
+
+    def __init__(self):
+        self.catalog = FakeCatalog()
+
+
+@pytest.mark.asyncio
+async def test_fanout():
+    client = FakeClient()
+    fanout = Fanout(client, concurrency=2, timeout=0.1)
+    results = await fanout.catalog.services()
+    assert isinstance(results, FanoutResult)
+    assert results == {"dc1": ({"consul": []}, {"Index": "dc1"})}
+    assert results.failed
+    assert isinstance(results.errors["dc2"], ValueError)
+    assert isinstance(results.errors["dc3"], asyncio.TimeoutError)
+    assert client.catalog.concurrency == 2
+
+
+@pytest.mark.asyncio
+async def test_fanout_dcs():
+    client = FakeClient()
+    results = await Fanout(client, ["dc1"]).run(lambda dc: asyncio.sleep(0, dc))
+    assert results == {"dc1": "dc1"}
+    assert not results.failed
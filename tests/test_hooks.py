@@ -0,0 +1,106 @@
+import pytest
+from aioconsul.api import API
+from aioconsul.common import Response
+from aioconsul.hooks import Hooks, MetricsCollector, path_template
+
+
+class FakeHandler:
+
+    address = "127.0.0.1:8500"
+
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, method, path, **kwargs):
+        self.requests.append(kwargs)
+        if path.startswith("/v1/kv/missing"):
+            return Response(path, 404, None, {}, method, size=0)
+        if path == "/v1/status/leader":
+            raise ConnectionError("refused")
+        headers = {"X-Consul-Index": "12"}
+        return Response(path, 200, [], headers, method,
+                        size=2, decode_time=.001)
+
+    async def close(self, **kwargs):
+        pass
+
+
+class Recorder(Hooks):
+
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, request):
+        self.events.append(("start", request["path"]))
+
+    def on_watch_wakeup(self, request, response, *, changed):
+        self.events.append(("wakeup", changed))
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/v1/kv/foo/bar", "/v1/kv/{key}"),
+    ("/v1/query/abc/execute", "/v1/query/{query}/execute"),
+    ("/v1/catalog/service/web", "/v1/catalog/service/{name}"),
+    ("/v1/health/state/any", "/v1/health/state/{name}"),
+    ("/v1/catalog/services", "/v1/catalog/services"),
+])
+def test_path_template(path, expected):
+    assert path_template(path) == expected
+
+
+@pytest.mark.asyncio
+async def test_hooks():
+    api = API("127.0.0.1:8500")
+    assert not _instrumented(api)
+    api.req_handler = FakeHandler()
+    recorder, metrics = Recorder(), MetricsCollector(buckets=[.1, 1])
+    api.add_hook(recorder)
+    api.add_hook(metrics)
+
+    await api.get("/v1/kv/foo", watch=(12, "1s"))
+    await api.get("/v1/kv/bar", watch=(10, "1s"))
+    await api.put("/v1/kv/bar", data=b"baz",
+                  headers={"Content-Type": "application/octet-stream"})
+    with pytest.raises(Exception):
+        await api.get("/v1/kv/missing")
+    with pytest.raises(ConnectionError):
+        await api.get("/v1/status/leader")
+
+    assert recorder.events[:4] == [("start", "/v1/kv/foo"),
+                                   ("wakeup", False),
+                                   ("start", "/v1/kv/bar"),
+                                   ("wakeup", True)]
+    assert metrics.statuses == {("GET", "/v1/kv/{key}", 200): 2,
+                                ("PUT", "/v1/kv/{key}", 200): 1,
+                                ("GET", "/v1/kv/{key}", 404): 1}
+    assert metrics.errors == {("GET", "/v1/status/leader"): 1}
+    assert metrics.bytes_in["/v1/kv/{key}"] == 6
+    assert metrics.bytes_out["/v1/kv/{key}"] == 3
+    assert metrics.wakeups == {("/v1/kv/{key}", False): 1,
+                               ("/v1/kv/{key}", True): 1}
+    assert metrics.latencies["GET", "/v1/kv/{key}"].count == 3
+
+    text = metrics.prometheus()
+    assert '# TYPE consul_request_duration_seconds histogram' in text
+    assert ('consul_request_duration_seconds_bucket{method="GET",'
+            'path="/v1/kv/{key}",le="+Inf"} 3') in text
+    assert ('consul_responses_total{method="GET",path="/v1/kv/{key}",'
+            'status="404"} 1') in text
+
+    lines = metrics.statsd()
+    assert "consul.response.GET.v1_kv_key.200:2|c" in lines
+    assert len([line for line in lines if line.endswith("|ms")]) == 5
+    await api.get("/v1/kv/foo")
+    assert [line for line in metrics.statsd() if line.endswith("|c")] == [
+        "consul.bytes_in.v1_kv_key:2|c",
+        "consul.response.GET.v1_kv_key.200:1|c",
+    ]
+
+    api.remove_hook(recorder)
+    assert _instrumented(api)
+    api.remove_hook(metrics)
+    assert not _instrumented(api)
+
+
+def _instrumented(api):
+    return api.apply.__qualname__.startswith("hooks_middleware")
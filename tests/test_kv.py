@@ -1,5 +1,10 @@
+import asyncio
 import pytest
-from aioconsul import NotFound
+from aioconsul import ConflictError, NotFound, TransactionError
+from aioconsul.client import KVEndpoint, KVMirror, KVTree
+from aioconsul.client.kv_endpoint import fetch_keys
+from aioconsul.common import Response
+from base64 import b64encode
 from collections.abc import Sequence
 
 
@@ -19,6 +24,15 @@ async def test_keys(client):
     assert "Index" in meta
     assert "KnownLeader" in meta
     assert "LastContact" in meta
+    buf = bytearray(4)
+    result, meta = await client.kv.raw("foo", into=buf)
+    assert result == 3
+    assert buf == bytes("bar\0", encoding="utf-8")
+    result = await client.kv.set("foo", memoryview(buf)[:3])
+    assert result is True
+    chunks = []
+    result, meta = await client.kv.raw("foo", into=chunks.append)
+    assert b"".join(chunks) == bytes("bar", encoding="utf-8")
     result = await client.kv.delete("foo")
     assert result is True
     result = await client.kv.delete("foo")
@@ -89,3 +103,375 @@ async def test_transaction(client):
     assert ops[0]["Value"] is None
     assert ops[1]["Key"] == "foo"
     assert ops[1]["Value"] == b"bar"
+
+
+def kv_entry(key, index=1):
+    return {"Key": key, "ModifyIndex": index, "Flags": 0,
+            "Value": key.encode("utf-8")}
+
+
+TREE_KEYS = ["web/bar", "web/foo", "web/subdir/a", "web/subdir/b",
+             "web2", "zip"]
+
+
+@pytest.mark.parametrize("prefix, separator, expected", [
+    ("", None, TREE_KEYS),
+    ("web", None, TREE_KEYS[:5]),
+    ("web/", "/", ["web/bar", "web/foo", "web/subdir/"]),
+    ("", "/", ["web/", "web2", "zip"]),
+    ("web/s", None, ["web/subdir/a", "web/subdir/b"]),
+    ("nope", None, []),
+])
+def test_tree_keys(prefix, separator, expected):
+    tree = KVTree([kv_entry(key) for key in TREE_KEYS])
+    assert tree.keys(prefix, separator=separator) == expected
+
+
+def test_tree():
+    tree = KVTree([kv_entry(key) for key in TREE_KEYS])
+    assert len(tree) == 6
+    assert tree.count("web") == 5
+    assert tree.count("web/subdir/") == 2
+    assert tree.get("web/foo")["Value"] == b"web/foo"
+    assert tree.get("web/fo") is None
+    assert "zip" in tree
+    assert tree.discard("web/subdir/a") is True
+    assert tree.discard("web/subdir/a") is False
+    assert tree.count("web/") == 3
+    assert [obj["Key"] for obj in tree.items("web/")] == [
+        "web/bar", "web/foo", "web/subdir/b"
+    ]
+
+
+def test_tree_replace():
+    tree = KVTree([kv_entry(key) for key in TREE_KEYS])
+    changed, removed = tree.replace("web/", [
+        kv_entry("web/bar"),
+        kv_entry("web/foo", 2),
+        kv_entry("web/new"),
+    ])
+    assert changed == ["web/foo", "web/new"]
+    assert removed == ["web/subdir/a", "web/subdir/b"]
+    assert tree.keys() == ["web/bar", "web/foo", "web/new", "web2", "zip"]
+
+
+class FakeKV:
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    async def get_tree(self, prefix, *, dc=None, watch=None):
+        response = self.responses.pop(0)
+        if response is None:
+            raise NotFound("", meta={"Index": 3})
+        return response
+
+
+@pytest.mark.asyncio
+async def test_mirror():
+    mirror = KVMirror(FakeKV(
+        ([kv_entry("web/foo")], {"Index": 2}),
+        None,
+    ), "web/")
+    await mirror.refresh()
+    assert mirror.tree.keys() == ["web/foo"]
+    await mirror.refresh()
+    assert mirror.index == 3
+    assert len(mirror.tree) == 0
+
+
+@pytest.mark.asyncio
+async def test_mirror_restore(tmpdir):
+    path = str(tmpdir.join("mirror"))
+    mirror = KVMirror(FakeKV(([kv_entry("web/foo")], {"Index": 2})), "web/")
+    assert mirror.restore(path) is False
+    await mirror.refresh()
+    mirror.save(path)
+
+    endpoint = FakeKV(([kv_entry("web/foo")], {"Index": 2}))
+    mirror = KVMirror(endpoint, "web/", wait="10s")
+    assert mirror.restore(path) is True
+    assert mirror.index == 2
+    assert mirror.tree.get("web/foo")["Value"] == b"web/foo"
+    assert await mirror.refresh() is False
+
+
+class FakeStore:
+
+    address = "127.0.0.1:8500"
+
+    def __init__(self, data, *, index=10):
+        self.data = data
+        self.index = index
+        self.txns = []
+
+    def list(self, prefix, separator):
+        results = set()
+        for key in self.data:
+            if key.startswith(prefix):
+                found = key.find(separator, len(prefix))
+                results.add(key if found < 0 else key[:found + 1])
+        return sorted(results)
+
+    async def get(self, path, prefix, *, params, watch, consistency, sink):
+        keys = self.list(prefix, params["separator"])
+        if not keys:
+            raise NotFound("")
+        headers = {"X-Consul-Index": str(self.index)}
+        return Response(path, 200, keys, headers, "GET")
+
+    async def put(self, path, *, data, params):
+        self.txns.append(len(data))
+        keys = [op["KV"]["Key"] for op in data]
+        errors = [{"OpIndex": i, "What": "key doesn't exist"}
+                  for i, key in enumerate(keys) if key not in self.data]
+        if errors:
+            raise ConflictError({"Errors": errors})
+        results = [{"KV": {"Key": key, "Flags": 0, "ModifyIndex": index,
+                           "Value": b64encode(key.encode()).decode()}}
+                   for key, index in ((key, self.data[key]) for key in keys)]
+        return Response("/v1/txn", 200, {"Results": results}, {}, "PUT")
+
+
+@pytest.mark.asyncio
+async def test_iter_tree():
+    data = {"a/%s/%s" % (i, j): 1 for i in range(5) for j in range(30)}
+    data.update({"a/b": 1, "a/b/": 1, "a/b/c": 20, "b": 1})
+    store = FakeStore(data)
+    endpoint = KVEndpoint(store)
+    iterator = endpoint.iter_tree("a/", chunk_size=16, concurrency=2)
+    values = []
+    async for obj in iterator:
+        values.append(obj)
+    assert sorted(obj["Key"] for obj in values) == sorted(data)[:-1]
+    assert values[0]["Value"] == values[0]["Key"].encode()
+    assert max(store.txns) == 16
+    assert iterator.index == 10
+    assert iterator.consistent is False
+
+
+@pytest.mark.asyncio
+async def test_iter_tree_deleted():
+    store = FakeStore({"a/b": 1, "a/c": 1})
+    store.list = lambda prefix, separator: ["a/b", "a/c", "a/d"]
+    iterator = KVEndpoint(store).iter_tree("a/")
+    keys = []
+    async for obj in iterator:
+        keys.append(obj["Key"])
+    assert keys == ["a/b", "a/c"]
+    assert iterator.consistent is False
+
+
+@pytest.mark.asyncio
+async def test_iter_tree_created():
+    store = FakeStore({"a/b/c": 1, "a/d": 1})
+    listing = store.get
+
+    async def get(*args, **kwargs):
+        response = await listing(*args, **kwargs)
+        store.index += 1
+        return response
+    store.get = get
+    iterator = KVEndpoint(store).iter_tree("a/")
+    keys = []
+    async for obj in iterator:
+        keys.append(obj["Key"])
+    assert keys == ["a/d", "a/b/c"]
+    assert iterator.index == 10
+    assert iterator.consistent is False
+
+
+@pytest.mark.asyncio
+async def test_fetch_keys_denied():
+    store = FakeStore({"a/b": 1})
+    endpoint = KVEndpoint(store)
+    assert [obj["Key"] for obj in await fetch_keys(
+        store, ["a/b", "a/c"])] == ["a/b"]
+
+    async def denied(path, *, data, params):
+        raise ConflictError({"Errors": [
+            {"OpIndex": 0, "What": "Permission denied"}]})
+    store.put = denied
+    with pytest.raises(TransactionError):
+        await fetch_keys(store, ["a/b"])
+    with pytest.raises(TransactionError):
+        await endpoint.iter_tree("a/").__anext__()
+
+
+class FakeTxn:
+
+    address = "127.0.0.1:8500"
+
+    def __init__(self, data, *, conflicts=0):
+        self.data = data
+        self.index = 10
+        self.conflicts = conflicts
+        self.events = []
+        self.calls = 0
+        self.failures = 0
+        self.denied = set()
+
+    def emit(self, event, *args, **kwargs):
+        self.events.append(event)
+
+    async def put(self, path, *, data, params):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("refused")
+        errors, results, writes = [], [], {}
+        for i, op in enumerate(op["KV"] for op in data):
+            key, current = op["Key"], self.data.get(op["Key"])
+            what = self.check(op, current)
+            if what:
+                errors.append({"OpIndex": i, "What": what})
+            elif op["Verb"] == "get":
+                results.append({"KV": {"Key": key, "Flags": 0,
+                                       "ModifyIndex": current[1],
+                                       "Value": current[0]}})
+            elif op["Verb"] in ("cas", "delete-cas", "set", "delete"):
+                writes[key] = op.get("Value")
+        if errors:
+            raise ConflictError({"Errors": errors})
+        for key, value in writes.items():
+            self.index += 1
+            if value is None:
+                self.data.pop(key, None)
+            else:
+                self.data[key] = (value, self.index)
+        return Response("/v1/txn", 200, {"Results": results}, {}, "PUT")
+
+    def check(self, op, current):
+        index = current[1] if current else 0
+        if op["Key"] in self.denied:
+            return "Permission denied"
+        if op["Verb"] == "get" and current is None:
+            return "key doesn't exist"
+        if op["Verb"] != "get" and self.conflicts:
+            self.conflicts -= 1
+            return "index is stale"
+        if op.get("Index", index) != index:
+            return "index is stale"
+
+
+def b64(value):
+    return b64encode(value).decode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_update():
+    store = FakeTxn({"hits": (b64(b"1"), 3)}, conflicts=2)
+    endpoint = KVEndpoint(store)
+    endpoint.backoff = 0
+
+    def incr(value):
+        return b"%d" % (int(value or 0) + 1)
+    assert await endpoint.update("hits", incr) == b"2"
+    assert await endpoint.update("misses", incr) == b"1"
+    assert store.data["hits"][0] == b64(b"2")
+    assert store.data["misses"][0] == b64(b"1")
+    assert endpoint.txn_stats == {"attempts": 4, "conflicts": 2,
+                                  "commits": 2}
+    assert store.events == ["on_retry", "on_retry"]
+
+    store.conflicts = 3
+    with pytest.raises(TransactionError):
+        await endpoint.update("hits", incr, retries=2)
+
+
+@pytest.mark.asyncio
+async def test_transact():
+    store = FakeTxn({"a": (b64(b"1"), 3), "b": (b64(b"2"), 4)})
+    endpoint = KVEndpoint(store)
+
+    async def move(values):
+        assert values == {"a": b"1", "b": b"2", "c": None}
+        return {"a": None, "c": values["a"]}
+    values = await endpoint.transact(["a", "b", "c"], move)
+    assert values == {"b": b"2", "c": b"1"}
+    assert sorted(store.data) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_buffer():
+    store = FakeTxn({})
+    endpoint = KVEndpoint(store)
+    async with endpoint.buffer(window=.01) as buffer:
+        for i in range(100):
+            await buffer.set("status/%d" % (i % 70), b"%d" % i)
+        await buffer.delete("status/1")
+        assert len(buffer) == 70
+        await asyncio.sleep(.05)
+        assert len(buffer) == 0
+        assert store.calls == 2
+        assert store.data["status/0"][0] == b64(b"70")
+        assert "status/1" not in store.data
+        assert buffer.stats == {"writes": 101, "coalesced": 31,
+                                "transactions": 2, "operations": 70}
+
+        store.failures = 1
+        await buffer.set("status/0", b"failed")
+        await asyncio.sleep(.05)
+        assert len(buffer) == 0
+        assert store.data["status/0"][0] == b64(b"failed")
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+
+        await buffer.set("status/0", b"closed")
+    assert store.data["status/0"][0] == b64(b"closed")
+    with pytest.raises(RuntimeError):
+        await buffer.set("status/0", b"reopen")
+
+    rejected = []
+    buffer = endpoint.buffer(window=.01, on_error=lambda key, error:
+                             rejected.append(key))
+    store.denied.add("private/a")
+    await buffer.set("private/a", b"a")
+    await buffer.set("status/a", b"a")
+    await buffer.set("status/b", b"b")
+    await asyncio.sleep(.05)
+    assert rejected == ["private/a"]
+    assert store.data["status/a"][0] == b64(b"a")
+    assert store.data["status/b"][0] == b64(b"b")
+    assert buffer.stats["rejected"] == 1 and len(buffer) == 0
+    with pytest.raises(TransactionError):
+        await buffer.flush()
+
+    await buffer.set("status/a", b"denied")
+    await buffer.set("private/a", b"denied")
+    with pytest.raises(TransactionError):
+        await buffer.flush()
+    assert rejected == ["private/a", "private/a"]
+    assert len(buffer) == 1
+    await buffer.close()
+    assert store.data["status/a"][0] == b64(b"denied")
+
+    buffer = endpoint.buffer(window=10, max_keys=2)
+    for i in range(5):
+        await buffer.set("k%d" % i, b"v")
+    assert len(buffer) == 1
+    assert store.calls == 11
+    await buffer.close()
+    assert len(buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_buffer_backoff(caplog):
+    store = FakeTxn({})
+    store.failures = 100
+    buffer = KVEndpoint(store).buffer(window=.01)
+    buffer.max_backoff = .04
+    await buffer.set("a", b"a")
+    await asyncio.sleep(.2)
+    # waits .01, .02, .04, .04... instead of .01 each time
+    assert 3 <= store.calls <= 8
+    messages = [record.getMessage() for record in caplog.records]
+    assert len([m for m in messages if "failed to flush" in m]) == 1
+
+    store.failures = 0
+    await asyncio.sleep(.1)
+    assert len(buffer) == 0
+    assert store.data["a"][0] == b64(b"a")
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    await buffer.close()
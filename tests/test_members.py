@@ -1,4 +1,5 @@
 import pytest
+from aioconsul.client import MembershipTracker
 
 
 @pytest.mark.asyncio
@@ -20,3 +21,49 @@ async def test_members_wan(client, server):
     assert isinstance(result, list)
     assert result[0]["Addr"] == "127.0.0.1"
     assert result[0]["Name"] == "%s.%s" % (server.name, server.dc)
+
+
+def member(name, status=1, **tags):
+    return {"Name": name, "Addr": "10.0.0.1", "Port": 8301,
+            "Tags": dict({"role": "node"}, **tags), "Status": status}
+
+
+class FakeMembers:
+
+    def __init__(self, members):
+        self.members = members
+
+    async def items(self, *, wan=None):
+        return list(self.members)
+
+
+@pytest.mark.asyncio
+async def test_tracker():
+    endpoint = FakeMembers([member("a"), member("b", role="consul"),
+                            member("c", status=3)])
+    tracker = MembershipTracker(endpoint, interval=1, max_interval=4)
+    events = []
+    tracker.add_listener(lambda event, obj: events.append((event,
+                                                           obj["Name"])))
+    assert await tracker.refresh() is True
+    assert events == [("join", "a"), ("join", "b")]
+    assert [m["Name"] for m in tracker.query(status=1)] == ["a", "b"]
+    assert [m["Name"] for m in tracker.query(tags={"role": "consul"})] == ["b"]
+
+    assert await tracker.refresh() is False
+    assert await tracker.refresh() is False
+    assert tracker.delay == 4
+
+    del events[:]
+    endpoint.members = [member("a", status=4), member("b", role="client"),
+                        member("c"), member("d")]
+    assert await tracker.refresh() is True
+    assert sorted(events) == [("fail", "a"), ("join", "c"), ("join", "d"),
+                              ("update", "b")]
+    assert tracker.delay == 1
+    assert tracker.query(tags={"role": "consul"}) == []
+
+    del events[:]
+    endpoint.members = [member("a", status=4), member("c")]
+    assert await tracker.refresh() is True
+    assert sorted(events) == [("leave", "b"), ("leave", "d")]
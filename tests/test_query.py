@@ -1,5 +1,8 @@
+import asyncio
 import pytest
 from aioconsul import ConsulError
+from aioconsul.client import QueryCache
+from datetime import timedelta
 
 
 @pytest.mark.asyncio
@@ -65,3 +68,72 @@ async def test_create(client):
 
     with pytest.raises(ConsulError):
         await client.query.delete(query)
+
+
+class FakeQueries:
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.calls = 0
+
+    async def execute(self, query, *, dc=None, near=None, limit=None):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return {"Service": query, "Nodes": [], "DNS": {"TTL": self.ttl}}
+
+
+@pytest.mark.asyncio
+async def test_cache():
+    endpoint = FakeQueries(timedelta(seconds=10))
+    cache = QueryCache(endpoint)
+    results = await asyncio.gather(cache.execute("foo"), cache.execute("foo"))
+    assert results[0] is results[1]
+    assert endpoint.calls == 1
+    assert await cache.execute({"ID": "foo"}) is results[0]
+    assert endpoint.calls == 1
+    await cache.execute("foo", near="_agent")
+    assert endpoint.calls == 2
+    cache.invalidate("foo")
+    await cache.execute("foo")
+    assert endpoint.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_refresh():
+    endpoint = FakeQueries(timedelta(seconds=10))
+    cache = QueryCache(endpoint, refresh=0)
+    first = await cache.execute("foo")
+    assert await cache.execute("foo") is first
+    await asyncio.sleep(0.01)
+    assert endpoint.calls == 2
+    assert await cache.execute("foo") is not first
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidate_in_flight():
+    endpoint = FakeQueries(timedelta(seconds=10))
+    cache = QueryCache(endpoint, refresh=0)
+    await cache.execute("foo")
+    await cache.execute("foo")
+    cache.invalidate("foo")
+    await asyncio.sleep(0.01)
+    assert endpoint.calls == 2
+    assert not cache._entries
+    await cache.execute("foo")
+    assert endpoint.calls == 3
+
+    # callers still get the result of the request they wait for
+    pending = asyncio.ensure_future(cache.execute("bar"))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    assert (await pending)["Service"] == "bar"
+    assert not cache._entries
+
+
+@pytest.mark.asyncio
+async def test_cache_no_ttl():
+    endpoint = FakeQueries("")
+    cache = QueryCache(endpoint)
+    await cache.execute("foo")
+    await cache.execute("foo")
+    assert endpoint.calls == 2
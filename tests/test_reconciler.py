@@ -0,0 +1,83 @@
+import pytest
+from aioconsul.client import ServiceReconciler
+from datetime import timedelta
+
+
+class FakeServices:
+
+    def __init__(self, objects, calls):
+        self.objects, self.calls = objects, calls
+
+    async def items(self):
+        return dict(self.objects)
+
+    async def register(self, service):
+        if service["Name"] == "broken":
+            raise ValueError("boom")
+        self.calls.append(("register", service["ID"]))
+        self.objects[service["ID"]] = {"ID": service["ID"],
+                                       "Service": service["Name"],
+                                       "Tags": service.get("Tags"),
+                                       "Address": "", "Port": 0,
+                                       "EnableTagOverride": False}
+
+    async def deregister(self, id):
+        self.calls.append(("deregister", id))
+        del self.objects[id]
+
+
+class FakeChecks(FakeServices):
+
+    async def register(self, check):
+        self.calls.append(("register", check["ID"]))
+        self.objects[check["ID"]] = {"CheckID": check["ID"],
+                                     "Name": check["Name"],
+                                     "Notes": "", "ServiceID": ""}
+
+
+class FakeClient:
+    address = "127.0.0.1:8500"
+
+    def __init__(self):
+        self.calls = []
+        self.services = FakeServices({
+            "consul": {"ID": "consul", "Service": "consul"},
+            "old": {"ID": "old", "Service": "old"},
+            "web": {"ID": "web", "Service": "web", "Tags": ["b", "a"],
+                    "Address": "", "Port": 0, "EnableTagOverride": False},
+        }, self.calls)
+        self.checks = FakeChecks({
+            "serfHealth": {"CheckID": "serfHealth", "Name": "Serf"},
+            "service:web": {"CheckID": "service:web", "Name": "web"},
+            "stale": {"CheckID": "stale", "Name": "stale"},
+        }, self.calls)
+
+
+@pytest.mark.asyncio
+async def test_reconcile():
+    client = FakeClient()
+    reconciler = ServiceReconciler(client, concurrency=2, prune=True)
+    services = [
+        {"ID": "web", "Name": "web", "Tags": ["a", "b"]},
+        {"ID": "db", "Name": "db"},
+        {"ID": "oops", "Name": "broken"},
+    ]
+    checks = [{"ID": "mem", "Name": "mem", "Interval": timedelta(seconds=10),
+               "Script": "check_mem"}]
+    result = await reconciler.reconcile(services, checks)
+    assert sorted(result.created) == [("check", "mem"), ("service", "db")]
+    assert sorted(result.deleted) == [("check", "stale"), ("service", "old")]
+    assert result.unchanged == [("service", "web")]
+    assert list(result.errors) == [("service", "oops")]
+    assert result.changed and result.failed
+
+    del client.calls[:]
+    result = await reconciler.reconcile(services[:2], checks)
+    assert client.calls == []
+    assert not result.changed
+
+    checks[0]["Interval"] = timedelta(seconds=20)
+    services[1]["Tags"] = ["primary"]
+    result = await reconciler.reconcile(services[:2], checks)
+    assert sorted(result.updated) == [("check", "mem"), ("service", "db")]
+    assert sorted(client.calls) == [("register", "db"), ("register", "mem")]
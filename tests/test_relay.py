@@ -0,0 +1,91 @@
+import asyncio
+import json
+import pytest
+from aiohttp import web
+from aioconsul import Consul
+from aioconsul.relay import WatchRelay
+
+
+class FakeAgent:
+
+    def __init__(self):
+        self.requests = []
+        self.index = 1
+        self.released = asyncio.Event()
+
+    async def handle(self, request):
+        self.requests.append((request.method, request.path_qs))
+        if request.path == "/v1/hang":
+            await self.released.wait()
+        if request.method == "PUT":
+            self.index += 1
+            return reply(True)
+        if request.query.get("index") == str(self.index):
+            await asyncio.sleep(.1)
+        return reply([{"Key": "config/a"}], index=self.index)
+
+
+def reply(obj, *, index=None):
+    headers = {"Content-Type": "application/json"}
+    if index is not None:
+        headers["X-Consul-Index"] = str(index)
+    return web.Response(body=json.dumps(obj).encode("utf-8"),
+                        headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_relay(tmpdir):
+    agent = FakeAgent()
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", agent.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.UnixSite(runner, str(tmpdir / "agent.sock")).start()
+
+    relay = WatchRelay("unix://%s" % (tmpdir / "agent.sock"),
+                       str(tmpdir / "relay.sock"))
+    async with relay:
+        workers = [Consul("unix://%s" % (tmpdir / "relay.sock"))
+                   for i in range(8)]
+        watch = (1, "1s")
+        responses = await asyncio.gather(*[
+            worker.api.get("/v1/kv/config/", params={"recurse": True},
+                           watch=watch) for worker in workers])
+        assert [r.body for r in responses] == [[{"Key": "config/a"}]] * 8
+        assert len(agent.requests) == 1
+        assert relay.stats["coalesced"] == 7
+
+        await workers[0].api.put("/v1/kv/config/a", data=b"b",
+                                 headers={"Content-Type": "text/plain"})
+        for worker in workers[:2]:
+            response = await worker.api.get("/v1/kv/config/",
+                                            params={"recurse": True},
+                                            watch=watch)
+            assert response.headers["X-Consul-Index"] == "2"
+        assert len(agent.requests) == 3
+        assert relay.stats["cached"] == 1
+
+        for worker in workers:
+            await worker.close()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_relay_timeout(tmpdir):
+    agent = FakeAgent()
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", agent.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.UnixSite(runner, str(tmpdir / "agent.sock")).start()
+
+    relay = WatchRelay("unix://%s" % (tmpdir / "agent.sock"),
+                       str(tmpdir / "relay.sock"), timeout=.05)
+    assert relay._timeout_of([("index", "1"), ("wait", "16s")]) == 17.05
+    assert relay._timeout_of([("recurse", "1")]) == .05
+    async with relay:
+        reply = await relay._fetch("GET", "/v1/hang", [], {}, None)
+        assert reply.status == 504
+        assert relay.stats["timeouts"] == 1
+        agent.released.set()
+    await runner.cleanup()
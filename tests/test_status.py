@@ -1,4 +1,8 @@
+import asyncio
 import pytest
+from aioconsul import UnauthorizedError
+from aioconsul.client import StatusEndpoint
+from aioconsul.common import Response
 
 
 @pytest.mark.asyncio
@@ -16,3 +20,125 @@ async def test_leader(client):
 async def test_peers(client):
     data = await client.status.peers()
     assert data == set(["127.0.0.1:8300"])
+
+
+class FakeAPI:
+
+    address = "10.0.0.1:8500"
+
+    def __init__(self):
+        self.hooks = []
+        self.leader = "10.0.0.1:8300"
+        self.calls = []
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    async def get(self, path, **kwargs):
+        self.calls.append(path)
+        if path == "/v1/status/leader":
+            return Response(path, 200, self.leader, {}, "GET")
+        if path == "/v1/status/peers":
+            return Response(path, 200, ["10.0.0.1:8300", "10.0.0.2:8300"],
+                            {}, "GET")
+        raise UnauthorizedError("Permission denied")
+
+
+@pytest.mark.asyncio
+async def test_monitor():
+    api = FakeAPI()
+    monitor = StatusEndpoint(api).monitor(interval=10)
+    assert StatusEndpoint(api).monitor() is monitor
+    assert api.hooks == [monitor]
+    other = FakeAPI()
+    assert StatusEndpoint(other).monitor(interval=5) is monitor
+    assert other.hooks == [monitor]
+    assert monitor.interval == 5
+
+    changes = []
+    monitor.add_listener(lambda old, new: changes.append((old, new)))
+    assert await monitor.refresh() is True
+    assert monitor.leader == "10.0.0.1:8300"
+    assert monitor.peers == {"10.0.0.1:8300", "10.0.0.2:8300"}
+    assert monitor.configuration is None
+    assert api.calls.count("/v1/operator/raft/configuration") == 1
+    assert await monitor.refresh() is False
+
+    # denied once, never requested again
+    api.leader = "10.0.0.2:8300"
+    assert await monitor.refresh() is True
+    assert api.calls.count("/v1/operator/raft/configuration") == 1
+    assert changes == [(None, "10.0.0.1:8300"),
+                       ("10.0.0.1:8300", "10.0.0.2:8300")]
+
+    def observe(known_leader, last_contact="12"):
+        headers = {"X-Consul-KnownLeader": known_leader,
+                   "X-Consul-LastContact": last_contact}
+        response = Response("/v1/kv/foo", 200, [], headers, "GET")
+        monitor.on_request_end({}, response, elapsed=.1)
+    observe("true")
+    assert monitor.known_leader is True
+    assert monitor.last_contact == 12
+
+    pause = asyncio.ensure_future(monitor.pause(False))
+    await asyncio.sleep(0)
+    observe("false")
+    await asyncio.wait_for(pause, 1)
+    assert monitor.known_leader is False
+
+    # polls are skipped while responses show a known leader
+    monitor.interval = .01
+    observe("true")
+    pause = asyncio.ensure_future(monitor.pause(False))
+    for i in range(5):
+        await asyncio.sleep(.01)
+        observe("true")
+    assert not pause.done()
+    await asyncio.wait_for(pause, 1)
+
+    # a stale last contact looks like a lost leader
+    monitor.interval = 10
+    pause = asyncio.ensure_future(monitor.pause(False))
+    await asyncio.sleep(0)
+    observe("true", "5000")
+    await asyncio.wait_for(pause, 1)
+
+    # polls are skipped for at most max_interval
+    monitor.interval, monitor.max_interval = .01, .03
+    pause = asyncio.ensure_future(monitor.pause(False))
+    observe("true")
+    for i in range(10):
+        await asyncio.sleep(.01)
+        observe("true")
+    assert pause.done()
+
+
+class OtherAPI(FakeAPI):
+
+    address = "10.0.0.2:8500"
+
+
+class FakeOperatorAPI(OtherAPI):
+
+    async def get(self, path, **kwargs):
+        if path == "/v1/operator/raft/configuration":
+            self.calls.append(path)
+            servers = [{"ID": self.leader, "Leader": True}]
+            return Response(path, 200, {"Servers": servers, "Index": 1},
+                            {}, "GET")
+        return await super().get(path, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_monitor_configuration():
+    api = FakeOperatorAPI()
+    monitor = StatusEndpoint(api).monitor()
+    assert await monitor.refresh() is True
+    assert monitor.configuration["Servers"][0]["ID"] == "10.0.0.1:8300"
+    assert await monitor.refresh() is False
+    assert api.calls.count("/v1/operator/raft/configuration") == 1
+
+    api.leader = "10.0.0.2:8300"
+    assert await monitor.refresh() is True
+    assert monitor.configuration["Servers"][0]["ID"] == "10.0.0.2:8300"
+    assert api.calls.count("/v1/operator/raft/configuration") == 2
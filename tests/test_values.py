@@ -0,0 +1,53 @@
+import pytest
+from aioconsul.client import KVOperations
+from aioconsul.common import Response
+from aioconsul.encoders import decode_value, encode_value
+from aioconsul.encoders.values import JSONCodec, ValueCodecs, ZlibCodec
+from aioconsul.encoders.values import codecs
+from base64 import b64encode
+
+
+@pytest.fixture
+def flags():
+    codecs.register(42, ZlibCodec(JSONCodec()))
+    yield 42
+    codecs.unregister(42)
+
+
+def test_codecs():
+    registry = ValueCodecs()
+    registry.register(1, JSONCodec())
+    assert registry.encode({"foo": 1}, 1) == b'{"foo":1}'
+    assert registry.decode(b'{"foo":1}', 1) == {"foo": 1}
+    assert registry.encode(b"foo", 2) == b"foo"
+    assert registry.decode(b"foo", None) == b"foo"
+    with pytest.raises(ValueError):
+        registry.register(0, JSONCodec())
+
+
+def test_values(flags):
+    value = {"foo": ["bar"] * 100}
+    data = encode_value(value, flags, base64=True)
+    assert len(data) < 100
+    assert decode_value(data, flags) == value
+    assert decode_value(b64encode(b"foo"), 1) == b"foo"
+    assert decode_value(None, flags) is None
+    with pytest.raises(ValueError):
+        encode_value(value, 1)
+
+
+class FakeAPI:
+
+    address = "127.0.0.1:8500"
+
+    async def put(self, path, *, data, params):
+        results = [{"KV": dict(op["KV"], ModifyIndex=1)} for op in data]
+        return Response(path, 200, {"Results": results}, {}, "PUT")
+
+
+@pytest.mark.asyncio
+async def test_transaction(flags):
+    txn = KVOperations(FakeAPI())
+    txn.set("foo", {"bar": 1}, flags=flags)
+    results = await txn.execute()
+    assert results[0]["Value"] == {"bar": 1}